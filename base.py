@@ -8,6 +8,11 @@ import random
 import json
 import re
 from selenium import webdriver
+from selenium.webdriver.chrome.remote_connection import ChromeRemoteConnection
+from selenium.webdriver.chrome.service import Service as ChromeService
+from selenium.webdriver.common.driver_finder import DriverFinder
+from selenium.webdriver.remote.client_config import ClientConfig
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
@@ -18,17 +23,133 @@ from selenium.common.exceptions import (
     ElementClickInterceptedException
 )
 
+try:
+    import orjson
+except ImportError:  # stdlib json writes the same files, just slower
+    orjson = None
+
+
+# Resources the scrapers never read; blocked via CDP where only the DOM matters
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.webp', '*.gif', '*.woff*',
+    '*google-analytics*', '*doubleclick*'
+]
+
+# Chrome content settings (2 = block) for runs that only read the DOM;
+# <img> src/srcset attributes are still in the markup, just not downloaded
+ASSET_BLOCKING_PREFS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.managed_default_content_settings.stylesheets": 2,
+    "profile.managed_default_content_settings.fonts": 2,
+}
+
+# Upper bound for driver.get(); with the eager strategy this only trips on a hung page
+PAGE_LOAD_TIMEOUT = 15
+
+# Connections kept alive to chromedriver (urllib3 default is a single one)
+DRIVER_POOL_MAXSIZE = 20
+
+# Seconds a single WebDriver command may take (Selenium's own local default)
+DRIVER_COMMAND_TIMEOUT = 120
+
+
+def dump_json_bytes(data, indent=True):
+    """Serialize to UTF-8 JSON bytes (orjson when available, numpy values allowed)"""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+    
+    if indent:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def driver_client_config(remote_server_addr):
+    """Keep-alive WebDriver connection settings with room for concurrent commands"""
+    return ClientConfig(
+        remote_server_addr=remote_server_addr,
+        keep_alive=True,
+        timeout=DRIVER_COMMAND_TIMEOUT,
+        init_args_for_pool_manager={
+            "init_args_for_pool_manager": {"maxsize": DRIVER_POOL_MAXSIZE}
+        },
+    )
+
+
+class PooledChrome(webdriver.Chrome):
+    """webdriver.Chrome talking to chromedriver through driver_client_config()
+    
+    webdriver.Chrome has no client_config argument, so this starts the
+    driver service the same way it does and hands the connection in.
+    """
+    
+    def __init__(self, options):
+        self.service = ChromeService()
+        finder = DriverFinder(self.service, options)
+        if finder.get_browser_path():
+            options.binary_location = finder.get_browser_path()
+            options.browser_version = None
+        self.service.path = self.service.env_path() or finder.get_driver_path()
+        self.service.start()
+        
+        executor = ChromeRemoteConnection(
+            remote_server_addr=self.service.service_url,
+            ignore_proxy=options._ignore_local_proxy,
+            client_config=driver_client_config(self.service.service_url),
+        )
+        try:
+            RemoteWebDriver.__init__(self, command_executor=executor, options=options)
+        except Exception:
+            self.quit()
+            raise
+        self._is_remote = False
+
 
 class NissanScraperBase:
     """Base class with common scraping utilities"""
     
-    def __init__(self, headless=False, delay_range=(2, 4)):
+    def __init__(self, headless=False, delay_range=(2, 4), block_assets=False,
+                 chrome_args=None, chrome_prefs=None, driver=None, grid_url=None, fast_load=False,
+                 lazy_driver=False):
         self.delay_range = delay_range
-        self.driver = self._setup_driver(headless)
-        self.wait = WebDriverWait(self.driver, 15)
+        self._driver_args = (headless, block_assets, chrome_args, chrome_prefs, grid_url, fast_load)
+        # An already running driver (e.g. from a BrowserPool) skips the browser launch;
+        # with lazy_driver Chrome only starts the first time self.driver is used
+        self._driver = None
+        if driver is not None:
+            self.driver = driver
+        elif not lazy_driver:
+            self.driver = self._setup_driver(*self._driver_args)
+    
+    @property
+    def driver(self):
+        """The WebDriver, started on first use for lazy_driver scrapers"""
+        if self._driver is None:
+            self.driver = self._setup_driver(*self._driver_args)
+        return self._driver
+    
+    @driver.setter
+    def driver(self, driver):
+        self._driver = driver
+        self._wait = WebDriverWait(driver, 15)
+    
+    @property
+    def wait(self):
+        """15s WebDriverWait on self.driver (starting it if needed)"""
+        self.driver
+        return self._wait
+        
+    def _setup_driver(self, headless=False, block_assets=False, chrome_args=None, chrome_prefs=None,
+                      grid_url=None, fast_load=False):
+        """Configure Chrome WebDriver with anti-detection measures
         
-    def _setup_driver(self, headless=False):
-        """Configure Chrome WebDriver with anti-detection measures"""
+        chrome_args / chrome_prefs are added on top of the defaults below.
+        With grid_url the browser runs on a Selenium Grid node instead of locally.
+        fast_load is for read-only scrapers: get() returns at DOMContentLoaded
+        and gives up after PAGE_LOAD_TIMEOUT (see _load_page).
+        """
         options = webdriver.ChromeOptions()
         
         # Basic options
@@ -48,16 +169,57 @@ class NissanScraperBase:
         if headless:
             options.add_argument('--headless=new')
         
-        driver = webdriver.Chrome(options=options)
+        if fast_load:
+            # Return from get() at DOMContentLoaded instead of after every sub-resource
+            options.page_load_strategy = 'eager'
         
-        # Additional anti-detection
-        driver.execute_cdp_cmd('Network.setUserAgentOverride', {
-            "userAgent": 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        for arg in chrome_args or ():
+            options.add_argument(arg)
+        
+        # Skip images, CSS and fonts (pass block_assets=False to see the real page)
+        prefs = dict(ASSET_BLOCKING_PREFS) if block_assets else {}
+        prefs.update(chrome_prefs or {})
+        if prefs:
+            options.add_experimental_option("prefs", prefs)
+        
+        if grid_url:
+            driver = webdriver.Remote(
+                command_executor=grid_url, options=options,
+                client_config=driver_client_config(grid_url)
+            )
+        else:
+            driver = PooledChrome(options=options)
+        if fast_load:
+            driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+        
+        # Additional anti-detection (CDP is only there on a local Chrome;
+        # the user-agent switch above covers Grid nodes)
+        if not grid_url:
+            driver.execute_cdp_cmd('Network.setUserAgentOverride', {
+                "userAgent": 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            })
         driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
         
         return driver
     
+    def _block_heavy_resources(self, patterns=None):
+        """Stop Chrome from downloading images, fonts and trackers (DOM and URLs still load)"""
+        try:
+            self.driver.execute_cdp_cmd('Network.enable', {})
+            self.driver.execute_cdp_cmd('Network.setBlockedURLs', {
+                'urls': patterns or BLOCKED_URL_PATTERNS
+            })
+        except Exception as e:
+            print(f"⚠ Could not block resources: {e}")
+    
+    def _load_page(self, url):
+        """Navigate to url; on a page-load timeout keep whatever DOM has arrived"""
+        try:
+            self.driver.get(url)
+        except TimeoutException:
+            print(f"⚠ Page load exceeded {PAGE_LOAD_TIMEOUT}s, continuing with partial page")
+            self.driver.execute_script("window.stop();")
+    
     def _random_delay(self):
         """Add random delay between actions"""
         delay = random.uniform(self.delay_range[0], self.delay_range[1])
@@ -148,10 +310,45 @@ class NissanScraperBase:
         self.driver.execute_script("window.scrollTo(0, 0);")
         time.sleep(1)
     
+    def _fast_scroll_to_load(self, card_selector, timeout=1.5, max_rounds=10):
+        """Jump to the bottom until lazy loading stops adding cards; returns the card count"""
+        page_state_js = (
+            "return [document.querySelectorAll(arguments[0]).length, document.body.scrollHeight];"
+        )
+        state = self.driver.execute_script(page_state_js, card_selector)
+        stable_rounds = 0
+        
+        for _ in range(max_rounds):
+            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            try:
+                # New cards or a taller page means lazy loading kicked in
+                WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(
+                    lambda d: d.execute_script(page_state_js, card_selector) != state
+                )
+                stable_rounds = 0
+            except TimeoutException:
+                stable_rounds += 1
+                if stable_rounds >= 2:
+                    break
+            state = self.driver.execute_script(page_state_js, card_selector)
+        
+        self.driver.execute_script("window.scrollTo(0, 0);")
+        return state[0]
+    
     def save_to_json(self, data, filename):
-        """Save data to JSON file"""
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        """Save data to JSON file (lists/dicts at once, other iterables item by item)"""
+        with open(filename, 'wb') as f:
+            if isinstance(data, (list, dict)):
+                f.write(dump_json_bytes(data))
+            else:
+                # Stream as a JSON array without materializing the whole list
+                f.write(b'[')
+                separator = b'\n  '
+                for item in data:
+                    f.write(separator)
+                    f.write(dump_json_bytes(item).replace(b'\n', b'\n  '))
+                    separator = b',\n  '
+                f.write(b'\n]' if separator != b'\n  ' else b']')
         print(f"✓ Data saved to {filename}")
     
     def print_car_list(self, car_data):
@@ -200,11 +397,27 @@ class NissanScraperBase:
 
         return links
 
+    def reset_session(self):
+        """Clear cookies and unload the current page so the driver can be reused"""
+        try:
+            self.driver.delete_all_cookies()
+            self.driver.get('about:blank')
+        except Exception as e:
+            print(f"⚠ Could not reset browser session: {e}")
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+    
     def close(self):
         """Close the browser"""
+        if self._driver is None:
+            return  # never started, nothing to close
         try:
             self.driver.quit()
             print("Browser closed")
         except:
             pass
-
@@ -0,0 +1,85 @@
+"""
+Browser Pool - warm scraper browsers shared by the workflow steps
+Each browser is started once and lent out, instead of one launch per step
+"""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+
+class BrowserPool:
+    """Fixed-size pool of pre-warmed scraper instances (one browser each)
+    
+    Browsers start in the background, all at once; acquire() only waits
+    for the first one to be ready. A browser that fails to start just makes
+    the pool smaller; acquire() only raises if none of them started.
+    """
+    
+    def __init__(self, factory, size=4):
+        if size < 1:
+            raise ValueError(f"BrowserPool needs at least one browser, got size={size}")
+        self.size = size
+        self._scrapers = queue.Queue()
+        self._start_lock = threading.Lock()
+        self._start_failures = []
+        
+        # Start all browsers at once instead of paying startup cost serially,
+        # without waiting for them here
+        executor = ThreadPoolExecutor(max_workers=size)
+        self._started = [executor.submit(self._start, factory) for _ in range(size)]
+        executor.shutdown(wait=False)
+    
+    def _start(self, factory):
+        try:
+            scraper = factory()
+        except Exception as e:
+            print(f"⚠ A pool browser failed to start: {str(e)[:100]}")
+            with self._start_lock:
+                self._start_failures.append(e)
+                none_started = len(self._start_failures) == self.size
+            if none_started:
+                # Handed to acquire() so callers fail instead of waiting forever
+                self._scrapers.put(e)
+            raise
+        self._scrapers.put(scraper)
+        return scraper
+    
+    def acquire(self):
+        """Take a scraper out of the pool, waiting until one is free"""
+        scraper = self._scrapers.get()
+        if isinstance(scraper, Exception):
+            # Only queued once every browser has failed to start
+            self._scrapers.put(scraper)
+            raise scraper
+        return scraper
+    
+    def release(self, scraper):
+        """Give a scraper from acquire() back to the pool"""
+        self._scrapers.put(scraper)
+    
+    @contextmanager
+    def borrow(self):
+        """acquire() for the length of a with block"""
+        scraper = self.acquire()
+        try:
+            yield scraper
+        finally:
+            self.release(scraper)
+    
+    def run(self, func, item):
+        """Call func(scraper, item) with a scraper borrowed from the pool"""
+        with self.borrow() as scraper:
+            return func(scraper, item)
+    
+    def map(self, func, items, max_workers=None):
+        """Run func(scraper, item) for every item concurrently, results in order"""
+        with ThreadPoolExecutor(max_workers=min(max_workers or self.size, self.size)) as executor:
+            return list(executor.map(lambda item: self.run(func, item), items))
+    
+    def close_all(self):
+        """Close every browser the pool started (waits for any still starting)"""
+        for future in self._started:
+            if future.exception() is None:
+                future.result().close()
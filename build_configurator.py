@@ -4,6 +4,7 @@ NissanScraperBase থেকে inherit করা হয়েছে
 নির্দিষ্ট data-testid সিলেক্টর ব্যবহার করে
 """
 
+import os
 import json
 import time
 import re
@@ -15,10 +16,69 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from base import NissanScraperBase
 from build_expand_clickers import SmartCardButtonClicker, main as clicker
 
+try:
+    import orjson
+except ImportError:  # fall back to the standard library parser
+    orjson = None
+
+
+# Simplified trims, appended one line per trim by car_list_processor while it runs
+TRIM_STREAM_FILE = "nissan_trims_simple.jsonl"
+# Legacy single-array version of the same data, written at the end of a run
+TRIM_JSON_FILE = "nissan_trims_simple.json"
+
+
+def load_trim_links(stream_path=TRIM_STREAM_FILE):
+    """Build links from the trim stream, or the legacy JSON file if there is no stream"""
+    if os.path.exists(stream_path):
+        return list(follow_trim_links(stream_path))
+    
+    with open(TRIM_JSON_FILE, 'r', encoding='utf-8') as f:
+        trim_data = json.load(f)
+    return [trim.get('page_link') for trim in trim_data if trim.get('page_link')]
+
+
+def follow_trim_links(stream_path=TRIM_STREAM_FILE, done_event=None, poll_interval=1.0):
+    """Yield build links from the trim stream as the processor appends them
+    
+    Keeps tailing the file until done_event is set (then drains what is
+    left); without an event the current contents are read once.
+    """
+    # The processor may not have created the file yet
+    while not os.path.exists(stream_path):
+        if done_event is None or done_event.is_set():
+            return
+        time.sleep(poll_interval)
+    
+    loads = orjson.loads if orjson is not None else json.loads
+    seen = set()
+    pending = b''
+    with open(stream_path, 'rb') as f:
+        while True:
+            # Checked before reading: if it was already set, an empty read means we are done
+            finished = done_event is None or done_event.is_set()
+            line = f.readline()
+            
+            if line:
+                pending += line
+                if not pending.endswith(b'\n'):
+                    continue  # the writer is mid-line
+                line, pending = pending, b''
+                if not line.strip():
+                    continue
+                link = loads(line).get('page_link')
+                if link and link not in seen:
+                    seen.add(link)
+                    yield link
+            elif finished:
+                return
+            else:
+                time.sleep(poll_interval)
+
 
 class NissanBuildPageScraper(NissanScraperBase):
-    def __init__(self, headless=False):
-        super().__init__(headless)
+    def __init__(self, headless=False, driver=None, grid_url=None):
+        super().__init__(headless, driver=driver, grid_url=grid_url)
         # self.headless = headless
         self.current_data = {}
         self.scraping_log = []
@@ -1119,7 +1179,42 @@ class NissanBuildPageScraper(NissanScraperBase):
                     pass
                 continue
         
-        # Save all results
+        self.save_all_results(all_results, len(build_links))
+        
+        return all_results
+    
+    def scrape_build_stream(self, build_links):
+        """Scrape build pages on this browser as links arrive (any iterable)"""
+        all_results = []
+        total = 0
+        
+        print("=" * 60)
+        print("NISSAN BUILD PAGE STREAMING SCRAPER")
+        print("=" * 60)
+        
+        for idx, build_url in enumerate(build_links, 1):
+            total = idx
+            print(f"\n[{idx}] Processing build page")
+            
+            try:
+                result = self.scrape_single_build(build_url)
+                
+                if result:
+                    all_results.append(result)
+                    print(f"✓ Successfully scraped")
+                else:
+                    print(f"✗ Failed to scrape")
+                    
+            except Exception as e:
+                print(f"❌ Error processing {build_url}: {str(e)[:100]}")
+                continue
+        
+        self.save_all_results(all_results, total)
+        
+        return all_results
+    
+    def save_all_results(self, all_results, total):
+        """Write the combined results of a batch to one timestamped file"""
         if all_results:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             all_results_file = f"nissan_all_builds_{timestamp}.json"
@@ -1130,13 +1225,11 @@ class NissanBuildPageScraper(NissanScraperBase):
             print(f"\n{'='*60}")
             print("BATCH PROCESSING COMPLETE")
             print(f"{'='*60}")
-            print(f"✓ Total processed: {len(build_links)}")
+            print(f"✓ Total processed: {total}")
             print(f"✓ Successfully scraped: {len(all_results)}")
-            print(f"✓ Failed: {len(build_links) - len(all_results)}")
+            print(f"✓ Failed: {total - len(all_results)}")
             print(f"✓ Combined results: {all_results_file}")
             print(f"{'='*60}")
-        
-        return all_results
 
 
 def main():
@@ -1144,9 +1237,7 @@ def main():
     # Load build links from your file
     build_links = []
     try:
-        with open('nissan_trims_simple.json', 'r', encoding='utf-8') as f:
-            trim_data = json.load(f)
-            build_links = [trim.get('page_link') for trim in trim_data if trim.get('page_link')]
+        build_links = load_trim_links()
     except:
         print("⚠ Could not load trim data file")
         # Use sample links for testing
@@ -1173,5 +1264,22 @@ def main():
     print("\n🎉 Nissan Build Page Scraping Complete!")
 
 
+def run_streaming(stream_path=TRIM_STREAM_FILE, done_event=None, headless=True, driver=None,
+                  grid_url=None):
+    """Process entry point: scrape build pages while trims are still being found
+    
+    A driver passed in (e.g. a pooled browser) is used and left open;
+    otherwise one is started, on the Selenium Grid at grid_url if given.
+    """
+    scraper = NissanBuildPageScraper(headless=headless, driver=driver, grid_url=grid_url)
+    try:
+        scraper.scrape_build_stream(follow_trim_links(stream_path, done_event))
+    finally:
+        if driver is None:
+            scraper.close()
+    
+    print("\n🎉 Nissan Build Page Scraping Complete!")
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
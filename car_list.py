@@ -3,306 +3,734 @@ Nissan USA Car List Scraper - Working File
 This script scrapes car list from a provided car build link
 """
 
-import time
+import os
 import re
-from base import NissanScraperBase
+import sys
+import json
+import threading
+from concurrent.futures import Future
+from base import NissanScraperBase, dump_json_bytes
+from http_client import make_http_session
+from browser_pool import BrowserPool
 from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from tenacity import retry, stop_after_attempt, wait_exponential_jitter, retry_if_exception
+
+try:
+    import lxml.html
+    from lxml import etree
+    from lxml.cssselect import CSSSelector
+except ImportError:  # static fast path is optional, Selenium works without it
+    lxml = None
+
+
+# Runs in the browser: arguments[0] is the card list, arguments[1] maps each
+# field to its selectors in priority order. Text is whitespace-normalized
+# before it crosses the wire; hits reports which selector index matched.
+CARD_EXTRACTOR_JS = r"""
+const cards = arguments[0], sel = arguments[1];
+const clean = e => e ? e.textContent.replace(/\s+/g, ' ').trim() : '';
+const firstText = (card, selectors, maxLen) => {
+    for (let i = 0; i < selectors.length; i++) {
+        for (const e of card.querySelectorAll(selectors[i])) {
+            const text = clean(e);
+            if (text && (!maxLen || text.length < maxLen)) return [text, i];
+        }
+    }
+    return ['', -1];
+};
+const firstLink = (card, selectors) => {
+    for (let i = 0; i < selectors.length; i++) {
+        for (const e of card.querySelectorAll(selectors[i])) {
+            const href = e.href || e.getAttribute('href');
+            if (href && (href.includes('nissan') || href.includes('http'))) return [href, i];
+        }
+    }
+    return ['', -1];
+};
+return cards.map(card => {
+    let [name, nameHit] = firstText(card, sel.name);
+    if (!name) {
+        const text = card.innerText || '';
+        const newline = text.indexOf('\n');
+        name = (newline < 0 ? text : text.slice(0, newline)).trim();
+    }
+    const [price, priceHit] = firstText(card, sel.price);
+    const [link, linkHit] = firstLink(card, sel.link);
+    const [trim, trimHit] = firstText(card, sel.trim, 50);
+    return {
+        name: name,
+        year: (name.match(/20\d{2}/) || [''])[0],
+        price: price,
+        page_link: link,
+        trim: trim,
+        hits: {name: nameHit, price: priceHit, link: linkHit, trim: trimHit}
+    };
+});
+"""
+
+# Learned selector order, reused by later runs
+SELECTOR_CACHE_FILE = os.path.expanduser('~/.nissan_scraper_selector_cache.json')
+SELECTOR_WARMUP_CARDS = 5
+
+# Keys kept in nissan_cars_simple.json
+SIMPLE_FIELDS = ('id', 'name', 'year', 'price', 'page_link')
+
+# Cars are appended here one line at a time while a page is being scraped.
+# Removed after the JSON views are written; left behind as the partial
+# result if scraping fails.
+CAR_LIST_SPILL_FILE = "nissan_car_list.ndjson"
+
+# Shared across threads so keep-alive connections are reused between links
+HTTP_SESSION = make_http_session()
+
+YEAR_RE = re.compile(r'20\d{2}')
+
+# Loads of the build page before a browser failure is given up on
+NAVIGATION_ATTEMPTS = 3
+
+PRODUCT_CARD_SELECTOR = '.sc-dyuvay.dHgRuz'
+ALTERNATIVE_CARD_SELECTORS = (
+    '[class*="product-card"]',
+    '[class*="vehicle-card"]',
+    '.vehicle-item',
+    '.model-card',
+)
+
+NAME_SELECTORS = (
+    'h3.sc-gLaqbQ.eDBrkr.sc-eQwNpu.kogNIX.sc-Goufe.bwIAyQ',  # Your exact class
+    'h3',  # Fallback to any h3
+    '.vehicle-name',
+    '.model-name',
+    '[class*="title"]',
+    '[class*="name"]',
+)
+
+PRICE_SELECTORS = (
+    '.sc-clirCP.HQxrh',  # Your exact price class
+    'span.sc-clirCP.HQxrh',  # As span tag
+    'div.sc-clirCP.HQxrh',  # As div tag
+    '[class*="sc-clirCP"]',  # Partial match
+    '[class*="price"]',  # Fallback
+    '.price',
+    '.msrp',
+    '[data-testid*="price"]',
+)
+
+LINK_SELECTORS = (
+    'a.sc-fhHczv.buKfDP.sc-kEjqvK.kDaJzo',  # Your exact class
+    'a[class*="sc-fhHczv"]',  # Partial match
+    'a',  # Fallback to any link
+    '[class*="link"]',
+    '[href*="nissan"]',
+)
+
+TRIM_SELECTORS = ('[class*="trim"]', '[class*="model"]', '[class*="variant"]')
+
+# Comma-joined unions: one find_elements call per field, [] instead of an
+# exception on a miss
+NAME_SELECTOR = ', '.join(NAME_SELECTORS)
+PRICE_SELECTOR = ', '.join(PRICE_SELECTORS)
+LINK_SELECTOR = ', '.join(LINK_SELECTORS)
+TRIM_SELECTOR = ', '.join(TRIM_SELECTORS)
+
+# Same selectors compiled once for the static (requests + lxml) fast path
+if lxml is not None:
+    STATIC_CARD_XPATH = etree.XPath('//*[contains(@class, "dHgRuz")]')
+    STATIC_NAME_SELECTORS = tuple(CSSSelector(s) for s in NAME_SELECTORS)
+    STATIC_PRICE_SELECTORS = tuple(CSSSelector(s) for s in PRICE_SELECTORS)
+    STATIC_LINK_SELECTORS = tuple(CSSSelector(s) for s in LINK_SELECTORS)
+
+
+class SelectorChain:
+    """Fallback selectors for one field, reordered by how often each one hits"""
+    
+    def __init__(self, field, selectors, hits=None):
+        self.field = field
+        self.selectors = list(selectors)
+        self.hits = {selector: 0 for selector in self.selectors}
+        for selector, count in (hits or {}).items():
+            if selector in self.hits:
+                self.hits[selector] = count
+        self.reorder()
+    
+    def record(self, index):
+        """Count a hit for the selector at index in the current order (-1 = miss)"""
+        if index >= 0:
+            self.hits[self.selectors[index]] += 1
+    
+    def reorder(self):
+        """Put the most successful selectors first (stable for ties)"""
+        if sum(self.hits.values()) >= SELECTOR_WARMUP_CARDS:
+            self.selectors.sort(key=lambda selector: -self.hits[selector])
+
+
+def load_selector_chains():
+    """Build selector chains for each field, seeded from the on-disk cache"""
+    try:
+        with open(SELECTOR_CACHE_FILE, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        cached = {}
+    
+    return {
+        field: SelectorChain(field, selectors, cached.get(field))
+        for field, selectors in (
+            ('name', NAME_SELECTORS),
+            ('price', PRICE_SELECTORS),
+            ('link', LINK_SELECTORS),
+            ('trim', TRIM_SELECTORS),
+        )
+    }
+
+
+def save_selector_chains(chains):
+    """Persist hit counts so the next run starts with the learned order"""
+    # Pooled scrapers share a pid, so the thread id keeps their temp files apart
+    tmp_file = f"{SELECTOR_CACHE_FILE}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({field: chain.hits for field, chain in chains.items()}, f, indent=2)
+        os.replace(tmp_file, SELECTOR_CACHE_FILE)
+    except OSError as e:
+        print(f"⚠ Could not save selector cache: {e}")
+
+
+def prefetch_build_page(url, session=HTTP_SESSION):
+    """Start downloading the build page on a background thread
+    
+    Meant to overlap the HTTP round-trip with a browser launch; returns a
+    Future of the response for scrape_car_list_from_link(prefetched=...),
+    or None when the static path is unavailable anyway.
+    """
+    if lxml is None:
+        return None
+    
+    future = Future()
+    
+    def fetch():
+        try:
+            future.set_result(session.get(url, timeout=15))
+        except Exception as e:
+            future.set_exception(e)
+    
+    threading.Thread(target=fetch, daemon=True).start()
+    return future
 
 
 class NissanCarListScraper(NissanScraperBase):
     """Scraper specifically for Nissan car list from build page"""
     
-    def __init__(self, headless=False, delay_range=(2, 4)):
-        super().__init__(headless, delay_range)
+    def __init__(self, headless=False, delay_range=(2, 4), verbose=True, block_assets=True,
+                 chrome_args=None, chrome_prefs=None, driver=None, grid_url=None, ctx=None,
+                 lazy_driver=True):
+        # Lazy by default: Chrome only starts if the static HTML has no cards
+        super().__init__(headless, delay_range, block_assets, chrome_args, chrome_prefs, driver, grid_url,
+                         fast_load=True, lazy_driver=lazy_driver)
+        # Plain HTTP goes through the workflow's shared session when there is one
+        self.http = ctx.http if ctx is not None else HTTP_SESSION
+        self.verbose = verbose
+        self.selector_chains = load_selector_chains()
         self.car_data = []
+        self.pages_scraped = 0
+        self._spill = None
+        self._on_car = None
     
-    def scrape_car_list_from_link(self, build_link):
+    def scrape_car_list_from_link(self, build_link, save=True, on_car=None,
+                                  ready_selector=PRODUCT_CARD_SELECTOR, prefetched=None):
         """
         Scrape car list from provided build link
         
         Steps:
-        1. Go to provided build link
-        2. Find all car product cards
-        3. Extract car names (from h3 tag)
-        4. Extract page links
-        5. Print list in terminal
-        6. Save to JSON file
+        1. Try a plain HTTP fetch of the build page (no browser)
+        2. Fall back to the browser if no cards are server-rendered
+        3. Extract car names, prices and page links
+        4. Print list in terminal
+        5. Save to JSON file (skipped when save=False)
+        
+        on_car, if given, is called with each car as soon as it is extracted
+        so later stages can start before the list is complete.
+        ready_selector is what the browser path waits for before reading cards.
+        prefetched is a prefetch_build_page(build_link) Future to use instead
+        of fetching the page again.
+        Returns the extracted car list.
         """
         print(f"\nScraping from link: {build_link}")
         
+        # Only the run that owns the output files streams cars to disk
+        self._spill = open(CAR_LIST_SPILL_FILE, 'wb') if save else None
+        self._on_car = on_car
+        
         try:
-            # Step 1: Navigate to build link
-            print("\n1. Navigating to build link...")
-            self.driver.get(build_link)
-            time.sleep(3)  # Initial load
-            
-            # Handle popups
-            self._handle_cookies_popup()
-            self._close_popups()
-            
-            # Step 2: Scroll to load all content
-            print("2. Loading page content...")
-            self._scroll_page_gradually()
+            # Fast path: server-rendered pages don't need a browser round-trip
+            print("\n0. Trying static HTML fetch...")
+            self.car_data = self._fast_static_scrape(build_link, prefetched)
             
-            # Step 3: Find all product cards
-            print("3. Looking for product cards...")
-            
-            # Using the exact class you provided
-            product_card_selector = '.sc-dyuvay.dHgRuz'
+            if self.car_data:
+                print(f"✓ Found {len(self.car_data)} product cards in static HTML")
+                for car in self.car_data:
+                    self._spill_car(car)
+            else:
+                print("⚠ No cards in static HTML, using browser...")
+                self._scrape_with_browser(build_link, ready_selector)
             
-            # Wait for cards to load
-            time.sleep(2)
+            # Step 4: Print list in terminal
+            self._write_lines(car_list_lines(self.car_data))
             
-            # Find all product cards
-            product_cards = self.driver.find_elements(By.CSS_SELECTOR, product_card_selector)
+            # Step 5: Save to JSON
+            if not self.car_data:
+                print("\n⚠ No car data was extracted!")
+            elif save:
+                self.save_car_list(self.car_data)
             
-            if not product_cards:
-                print("⚠ No cards found with exact selector, trying alternatives...")
-                # Try alternative selectors
-                alternative_selectors = [
-                    '[class*="product-card"]',
-                    '[class*="vehicle-card"]',
-                    '.vehicle-item',
-                    '.model-card'
-                ]
+            self._discard_spill()
                 
-                for alt_selector in alternative_selectors:
-                    product_cards = self.driver.find_elements(By.CSS_SELECTOR, alt_selector)
-                    if product_cards:
-                        print(f"✓ Found {len(product_cards)} cards with selector: {alt_selector}")
-                        break
+        except WebDriverException as e:
+            # The browser gave up even after retries; later steps still get
+            # every car extracted before that
+            print(f"\n✗ Error during scraping: {str(e)}")
+            
+            # Cars extracted so far are already on disk, one JSON line each
+            if self._spill and self.car_data:
+                self._spill.flush()
+                print(f"Partial data kept in {CAR_LIST_SPILL_FILE} ({len(self.car_data)} cars)")
+            elif self.car_data:
+                print("Saving partial data...")
+                self.save_to_json(self.car_data, "nissan_car_list_partial.json")
+        finally:
+            self._on_car = None
+            if self._spill:
+                self._spill.close()
+                self._spill = None
+        
+        return self.car_data
+    
+    def _spill_car(self, car_info):
+        """Append one extracted car to the NDJSON spill file and pass it to on_car"""
+        if self._spill:
+            self._spill.write(dump_json_bytes(car_info, indent=False) + b'\n')
+        if self._on_car:
+            self._on_car(car_info)
+    
+    def _discard_spill(self):
+        """Drop the spill file once the final JSON views are written"""
+        if self._spill:
+            self._spill.close()
+            self._spill = None
+            os.remove(CAR_LIST_SPILL_FILE)
+    
+    def save_car_list(self, cars):
+        """Save full and simplified car lists to JSON"""
+        self.save_to_json(cars, "nissan_car_list.json")
+        
+        # Also save a simplified version: a key-filtered view of the same
+        # records, streamed into the file without an intermediate list
+        simplified_data = ({k: car.get(k, '') for k in SIMPLE_FIELDS} for car in cars)
+        
+        self.save_to_json(simplified_data, "nissan_cars_simple.json")
+        
+        # Print summary
+        print("\n✓ Scraping completed successfully!")
+        print(f"✓ Total cars found: {len(cars)}")
+        print("✓ Data saved to: nissan_car_list.json")
+        print("✓ Simplified data saved to: nissan_cars_simple.json")
+    
+    def _fast_static_scrape(self, url, prefetched=None):
+        """Fetch the build page over HTTP and parse cards with lxml (no browser)"""
+        if lxml is None:
+            return []
+        
+        try:
+            if prefetched is not None:
+                response = prefetched.result()
+            else:
+                response = self.http.get(url, timeout=15)
+            response.raise_for_status()
+            tree = lxml.html.fromstring(response.text)
+            tree.make_links_absolute(response.url)
+        except Exception as e:
+            print(f"⚠ Static fetch failed: {str(e)[:50]}")
+            return []
+        
+        cars = []
+        for idx, card in enumerate(STATIC_CARD_XPATH(tree), 1):
+            car_info = {'id': idx}
             
-            print(f"✓ Found {len(product_cards)} product cards")
+            car_name = self._first_static_text(card, STATIC_NAME_SELECTORS)
+            if not car_name:
+                car_name = card.text_content().strip().partition('\n')[0] or f"Car_{idx}"
+            car_info['name'] = car_name
             
-            # Step 4: Extract data from each card
-            print("4. Extracting car details...")
+            year_match = YEAR_RE.search(car_name)
+            car_info['year'] = year_match.group() if year_match else ""
             
-            self.car_data = []
+            car_info['price'] = self._first_static_text(card, STATIC_PRICE_SELECTORS)
             
-            # Step 4: Extract data from each card
-            print("4. Extracting car details...")
-
-            self.car_data = []
-
-            for idx, card in enumerate(product_cards, 1):
-                try:
-                    car_info = {}
-                    car_info['id'] = idx
-                    
-                    # Scroll to card
-                    self._scroll_to_element(card)
-                    
-                    # A. Extract CAR NAME from h3 tag
-                    name_selectors = [
-                        'h3.sc-gLaqbQ.eDBrkr.sc-eQwNpu.kogNIX.sc-Goufe.bwIAyQ',  # Your exact class
-                        'h3',  # Fallback to any h3
-                        '.vehicle-name',
-                        '.model-name',
-                        '[class*="title"]',
-                        '[class*="name"]'
-                    ]
-                    
-                    car_name = ""
-                    for selector in name_selectors:
-                        try:
-                            name_element = card.find_element(By.CSS_SELECTOR, selector)
-                            car_name = name_element.text.strip()
-                            if car_name:
-                                break
-                        except:
-                            continue
-                    
-                    if not car_name:
-                        car_name = card.text.split('\n')[0] if card.text else f"Car_{idx}"
-                    
-                    car_info['name'] = car_name
-                    
-                    # B. Extract YEAR from name if available
-                    year_match = re.search(r'(20\d{2})', car_name)
-                    if year_match:
-                        car_info['year'] = year_match.group(1)
-                    else:
-                        car_info['year'] = ""
-                    
-                    # C. Extract PRICE with exact class "sc-clirCP HQxrh"
-                    price_selectors = [
-                        '.sc-clirCP.HQxrh',  # Your exact price class
-                        'span.sc-clirCP.HQxrh',  # As span tag
-                        'div.sc-clirCP.HQxrh',  # As div tag
-                        '[class*="sc-clirCP"]',  # Partial match
-                        '[class*="price"]',  # Fallback
-                        '.price',
-                        '.msrp',
-                        '[data-testid*="price"]'
-                    ]
-                    
-                    price_text = ""
-                    for selector in price_selectors:
-                        try:
-                            price_element = card.find_element(By.CSS_SELECTOR, selector)
-                            price_text = price_element.text.strip()
-                            if price_text:
-                                # Clean price text (remove extra spaces, newlines)
-                                price_text = ' '.join(price_text.split())
-                                break
-                        except:
-                            continue
-                    
-                    car_info['price'] = price_text
-                    
-                    # D. Extract PAGE LINK
-                    link_selectors = [
-                        'a.sc-fhHczv.buKfDP.sc-kEjqvK.kDaJzo',  # Your exact class
-                        'a[class*="sc-fhHczv"]',  # Partial match
-                        'a',  # Fallback to any link
-                        '[class*="link"]',
-                        '[href*="nissan"]'
-                    ]
-                    
-                    page_link = ""
-                    for selector in link_selectors:
-                        try:
-                            link_element = card.find_element(By.CSS_SELECTOR, selector)
-                            href = link_element.get_attribute('href')
-                            if href and ('nissan' in href or 'http' in href):
-                                page_link = href
-                                break
-                        except:
-                            continue
-                    
-                    car_info['page_link'] = page_link
-                    
-                    # E. Extract additional info if available
-                    try:
-                        # Try to get trim/model info
-                        trim_selectors = ['[class*="trim"]', '[class*="model"]', '[class*="variant"]']
-                        for selector in trim_selectors:
-                            try:
-                                trim_element = card.find_element(By.CSS_SELECTOR, selector)
-                                trim_text = trim_element.text.strip()
-                                if trim_text and len(trim_text) < 50:  # Avoid large texts
-                                    car_info['trim'] = trim_text
-                                    break
-                            except:
-                                continue
-                    except:
-                        pass
-                    
-                    # Add to list
-                    self.car_data.append(car_info)
-                    
-                    # Print progress with price
-                    price_display = f" - {price_text}" if price_text else ""
-                    print(f"  ✓ {idx:3d}. {car_name}{price_display}")
-                    
-                except Exception as e:
-                    print(f"  ✗ Error with card {idx}: {str(e)[:50]}")
-                    continue
+            page_link = ""
+            for selector in STATIC_LINK_SELECTORS:
+                for link_element in selector(card):
+                    href = link_element.get('href')
+                    if href and ('nissan' in href or 'http' in href):
+                        page_link = href
+                        break
+                if page_link:
+                    break
+            car_info['page_link'] = page_link
             
-            # Step 5: Print list in terminal
-            print("\n" + "="*60)
-            print("EXTRACTED CAR LIST WITH PRICES:")
-            print("="*60)
+            cars.append(car_info)
+        
+        return cars
+    
+    @staticmethod
+    def _first_static_text(card, selectors):
+        """Return normalized text of the first non-empty match across selectors"""
+        for selector in selectors:
+            for element in selector(card):
+                text = ' '.join(element.text_content().split())
+                if text:
+                    return text
+        return ""
+    
+    @retry(
+        stop=stop_after_attempt(NAVIGATION_ATTEMPTS),
+        wait=wait_exponential_jitter(initial=1, max=8),
+        # Page-load timeouts are already absorbed by _load_page; retry the
+        # rest (connection resets, renderer crashes, ...)
+        retry=retry_if_exception(
+            lambda e: isinstance(e, WebDriverException) and not isinstance(e, TimeoutException)
+        ),
+        before_sleep=lambda state: print(
+            f"⚠ Build page failed to load ({type(state.outcome.exception()).__name__}), "
+            f"retrying ({state.attempt_number}/{NAVIGATION_ATTEMPTS})..."
+        ),
+        reraise=True,
+    )
+    def _open_build_page(self, build_link):
+        """Load the build page, reloading on browser flakes"""
+        self._load_page(build_link)
+    
+    def _scrape_with_browser(self, build_link, ready_selector=PRODUCT_CARD_SELECTOR):
+        """Load the build page in the browser and extract cards into self.car_data"""
+        # Step 1: Navigate to build link
+        print("\n1. Navigating to build link...")
+        if self.pages_scraped:
+            # Same driver, fresh state: far cheaper than starting a new browser
+            self.reset_session()
+        self._block_heavy_resources()
+        self._open_build_page(build_link)
+        self.pages_scraped += 1
+        
+        # Wait for the cards themselves rather than a fixed sleep. A miss is
+        # normal when only ALTERNATIVE_CARD_SELECTORS match, so no reload
+        try:
+            WebDriverWait(self.driver, 10, poll_frequency=0.1).until(EC.presence_of_all_elements_located(
+                (By.CSS_SELECTOR, ready_selector)
+            ))
+        except TimeoutException:
+            print("⚠ Product cards did not appear in time, continuing...")
+        
+        # Handle popups
+        self._handle_cookies_popup()
+        self._close_popups()
+        
+        # Step 2: Scroll to load all content
+        print("2. Loading page content...")
+        self._fast_scroll_to_load(ready_selector)
+        
+        # Step 3: Find all product cards
+        print("3. Looking for product cards...")
+        
+        # Find all product cards
+        card_selector = PRODUCT_CARD_SELECTOR
+        product_cards = self.driver.find_elements(By.CSS_SELECTOR, card_selector)
+        
+        if not product_cards:
+            print("⚠ No cards found with exact selector, trying alternatives...")
+            # Try alternative selectors
+            for alt_selector in ALTERNATIVE_CARD_SELECTORS:
+                product_cards = self.driver.find_elements(By.CSS_SELECTOR, alt_selector)
+                if product_cards:
+                    card_selector = alt_selector
+                    print(f"✓ Found {len(product_cards)} cards with selector: {alt_selector}")
+                    break
+        
+        print(f"✓ Found {len(product_cards)} product cards")
+        
+        # Step 4: Extract data from each card
+        print("4. Extracting car details...")
+        
+        self.car_data = []
+        
+        # Step 4: Extract data from each card
+        print("4. Extracting car details...")
 
-            for car in self.car_data:
-                name = car.get('name', 'Unknown')
-                year = car.get('year', '')
-                price = car.get('price', 'Price not available')
-                link = car.get('page_link', 'No link')
-                
-                if year and price:
-                    print(f"• {name} ({year}) - {price}")
-                elif year:
-                    print(f"• {name} ({year})")
-                elif price and price != 'Price not available':
-                    print(f"• {name} - {price}")
+        # One round-trip to trigger any remaining lazy content instead of
+        # scrolling each card into view
+        self.driver.execute_script(
+            "window.scrollTo(0, document.body.scrollHeight); window.scrollTo(0, 0);"
+        )
+
+        self.car_data = []
+
+        # Read every card in one browser round-trip; per-card queries are
+        # only used if the script fails
+        extracted = self._extract_cards_js(product_cards)
+        prefetched = {} if extracted is not None else self._prefetch_fields(card_selector, product_cards)
+        
+        # Progress is buffered and written once instead of a print per card
+        log_lines = []
+
+        for idx, card in enumerate(product_cards, 1):
+            try:
+                if extracted is not None:
+                    car_info = self._car_from_extracted(extracted[idx - 1], idx)
                 else:
-                    print(f"• {name}")
-                
-                if link and link != 'No link':
-                    print(f"  🔗 {link[:80]}...")
-                print()
-            
-            print(f"Total cars extracted: {len(self.car_data)}")
-            print("="*60)
-            
-            # Step 6: Save to JSON
-            if self.car_data:
-                self.save_to_json(self.car_data, "nissan_car_list.json")
+                    car_info = self._extract_card(card, idx, prefetched)
                 
-                # Also save a simplified version
-                # Also save a simplified version
-                simplified_data = []
-                for car in self.car_data:
-                    simplified = {
-                        'id': car.get('id'),
-                        'name': car.get('name'),
-                        'year': car.get('year', ''),
-                        'price': car.get('price', ''),
-                        'page_link': car.get('page_link', '')
-                    }
-                    simplified_data.append(simplified)
+                # Add to list
+                self.car_data.append(car_info)
+                self._spill_car(car_info)
                 
-                self.save_to_json(simplified_data, "nissan_cars_simple.json")
-                
-                # Print summary
-                print("\n✓ Scraping completed successfully!")
-                print(f"✓ Total cars found: {len(self.car_data)}")
-                print("✓ Data saved to: nissan_car_list.json")
-                print("✓ Simplified data saved to: nissan_cars_simple.json")
-            
-            else:
-                print("\n⚠ No car data was extracted!")
+                # Record progress with price
+                price_display = f" - {car_info['price']}" if car_info['price'] else ""
+                log_lines.append(f"  ✓ {idx:3d}. {car_info['name']}{price_display}")
                 
+            except Exception as e:
+                log_lines.append(f"  ✗ Error with card {idx}: {str(e)[:50]}")
+                continue
+        
+        self._write_lines(log_lines)
+        
+        if extracted:
+            self._learn_selector_order(extracted)
+    
+    def _learn_selector_order(self, extracted):
+        """Record which selector matched for each field and persist the new order"""
+        for item in extracted:
+            for field, index in item['hits'].items():
+                self.selector_chains[field].record(index)
+        
+        for chain in self.selector_chains.values():
+            chain.reorder()
+        save_selector_chains(self.selector_chains)
+    
+    def _write_lines(self, lines):
+        """Write buffered output in a single call (silent unless verbose)"""
+        if self.verbose and lines:
+            sys.stdout.write('\n'.join(lines) + '\n')
+    
+    def _extract_cards_js(self, product_cards):
+        """Extract name/price/link/trim for all cards in a single execute_script call"""
+        try:
+            return self.driver.execute_script(CARD_EXTRACTOR_JS, product_cards, {
+                field: chain.selectors for field, chain in self.selector_chains.items()
+            })
         except Exception as e:
-            print(f"\n✗ Error during scraping: {str(e)}")
-            
-            # Try to save partial data
-            if self.car_data:
-                print("Saving partial data...")
-                self.save_to_json(self.car_data, "nissan_car_list_partial.json")
+            print(f"⚠ Batch extraction failed, reading cards one by one: {str(e)[:50]}")
+            return None
+    
+    def _car_from_extracted(self, item, idx):
+        """Build a car record from one batch-extractor result"""
+        car_info = {
+            'id': idx,
+            'name': item['name'] or f"Car_{idx}",
+            'year': item['year'],
+            'price': item['price'],
+            'page_link': item['page_link'],
+        }
+        if item['trim']:
+            car_info['trim'] = item['trim']
+        
+        return car_info
+    
+    def _prefetch_fields(self, card_selector, product_cards):
+        """One document-wide query per field, kept only when it lines up 1:1 with the cards"""
+        prefetched = {}
+        for field in ('name', 'price', 'link'):
+            # Best-performing selector so far (the "exact class" one until learned)
+            selector = self.selector_chains[field].selectors[0]
+            try:
+                elements = self.driver.find_elements(By.CSS_SELECTOR, f"{card_selector} {selector}")
+            except Exception:
+                continue
+            if len(elements) == len(product_cards):
+                prefetched[field] = elements
+        return prefetched
+    
+    @staticmethod
+    def _field_elements(card, idx, prefetched, field, union_selector):
+        """Prefetched element for this card if available, otherwise query the card"""
+        if field in prefetched:
+            return [prefetched[field][idx - 1]]
+        return card.find_elements(By.CSS_SELECTOR, union_selector)
+    
+    def _extract_card(self, card, idx, prefetched):
+        """Extract one car record with per-field WebDriver queries (fallback path)"""
+        car_info = {}
+        car_info['id'] = idx
+        
+        # A. Extract CAR NAME from h3 tag
+        car_name = ""
+        for name_element in self._field_elements(card, idx, prefetched, 'name', NAME_SELECTOR):
+            car_name = name_element.text.strip()
+            if car_name:
+                break
+        
+        if not car_name:
+            # One attribute fetch; only the first line is kept
+            card_text = card.get_attribute('innerText') or ''
+            car_name = card_text.partition('\n')[0].strip() or f"Car_{idx}"
+        
+        car_info['name'] = car_name
+        
+        # B. Extract YEAR from name if available
+        year_match = YEAR_RE.search(car_name)
+        if year_match:
+            car_info['year'] = year_match.group()
+        else:
+            car_info['year'] = ""
+        
+        # C. Extract PRICE with exact class "sc-clirCP HQxrh"
+        price_text = ""
+        for price_element in self._field_elements(card, idx, prefetched, 'price', PRICE_SELECTOR):
+            price_text = price_element.text.strip()
+            if price_text:
+                # Clean price text (remove extra spaces, newlines)
+                price_text = ' '.join(price_text.split())
+                break
+        
+        car_info['price'] = price_text
+        
+        # D. Extract PAGE LINK
+        page_link = ""
+        for link_element in self._field_elements(card, idx, prefetched, 'link', LINK_SELECTOR):
+            href = link_element.get_attribute('href')
+            if href and ('nissan' in href or 'http' in href):
+                page_link = href
+                break
+        
+        car_info['page_link'] = page_link
+        
+        # E. Extract additional info if available
+        try:
+            # Try to get trim/model info
+            for trim_element in card.find_elements(By.CSS_SELECTOR, TRIM_SELECTOR):
+                trim_text = trim_element.text.strip()
+                if trim_text and len(trim_text) < 50:  # Avoid large texts
+                    car_info['trim'] = trim_text
+                    break
+        except:
+            pass
+        
+        return car_info
 
 
-def main():
+def car_list_lines(cars):
+    """Format the extracted car list for the terminal"""
+    lines = ["", "="*60, "EXTRACTED CAR LIST WITH PRICES:", "="*60]
+    
+    for car in cars:
+        name = car.get('name', 'Unknown')
+        year = car.get('year', '')
+        price = car.get('price', 'Price not available')
+        link = car.get('page_link', 'No link')
+        
+        if year and price:
+            lines.append(f"• {name} ({year}) - {price}")
+        elif year:
+            lines.append(f"• {name} ({year})")
+        elif price and price != 'Price not available':
+            lines.append(f"• {name} - {price}")
+        else:
+            lines.append(f"• {name}")
+        
+        if link and link != 'No link':
+            lines.append(f"  🔗 {link[:80]}...")
+        lines.append("")
+    
+    lines.append(f"Total cars extracted: {len(cars)}")
+    lines.append("="*60)
+    return lines
+
+
+def main(build_links=None):
     """Main function to run the scraper"""
     print("="*60)
     print("NISSAN USA CAR LIST SCRAPER")
     print("="*60)
     
-    # Get build link from user
-    print("\nPlease enter the Nissan car build link:")
-    print("Example: https://www.nissanusa.com/vehicles/build-price.html")
-    print("Or: https://www.nissanusa.com/shopping-tools/build-price.html")
-    
-    build_link = input("\nEnter link: ").strip()
+    if build_links is None:
+        # Get build link(s) from user
+        print("\nPlease enter the Nissan car build link (separate several with spaces):")
+        print("Example: https://www.nissanusa.com/vehicles/build-price.html")
+        print("Or: https://www.nissanusa.com/shopping-tools/build-price.html")
+        
+        build_links = input("\nEnter link: ").replace(',', ' ').split()
     
-    if not build_link:
+    if not build_links:
         # Default link if none provided
-        build_link = "https://www.nissanusa.com/vehicles/build-price.html"
-        print(f"\nUsing default link: {build_link}")
+        build_links = ["https://www.nissanusa.com/vehicles/build-price.html"]
+        print(f"\nUsing default link: {build_links[0]}")
     
     # Configuration
     HEADLESS = False  # Set to True to run without browser window
     DELAY_RANGE = (2, 4)  # Delay between actions
+    MAX_BROWSERS = 4  # Upper bound on parallel browsers for several links
     
-    # Create scraper instance
-    scraper = NissanCarListScraper(headless=HEADLESS, delay_range=DELAY_RANGE)
+    if len(build_links) == 1:
+        try:
+            # The browser is closed when the block exits, even on errors
+            with NissanCarListScraper(headless=HEADLESS, delay_range=DELAY_RANGE) as scraper:
+                scraper.scrape_car_list_from_link(build_links[0])
+            
+        except KeyboardInterrupt:
+            print("\n\n⚠ Scraping interrupted by user")
+        except Exception as e:
+            print(f"\n\n✗ Fatal error: {e}")
+        finally:
+            print("\n" + "="*60)
+            print("PROGRAM COMPLETED")
+            print("="*60)
+        return
+    
+    # Several links: scrape them concurrently, one browser per worker.
+    # Workers stay quiet so they don't contend on stdout; the merged list
+    # is printed once below.
+    pool = BrowserPool(
+        lambda: NissanCarListScraper(headless=HEADLESS, delay_range=DELAY_RANGE, verbose=False),
+        size=min(MAX_BROWSERS, len(build_links))
+    )
     
     try:
-        # Start scraping
-        scraper.scrape_car_list_from_link(build_link)
+        results = pool.map(
+            lambda scraper, link: list(scraper.scrape_car_list_from_link(link, save=False)),
+            build_links
+        )
+        
+        all_cars = [car for cars in results for car in cars]
+        for idx, car in enumerate(all_cars, 1):
+            car['id'] = idx
+        
+        sys.stdout.write('\n'.join(car_list_lines(all_cars)) + '\n')
+        
+        if all_cars:
+            pool.run(NissanCarListScraper.save_car_list, all_cars)
+        else:
+            print("\n⚠ No car data was extracted!")
         
     except KeyboardInterrupt:
         print("\n\n⚠ Scraping interrupted by user")
     except Exception as e:
         print(f"\n\n✗ Fatal error: {e}")
     finally:
-        # Always close the browser
-        scraper.close()
+        # Always close the browsers
+        pool.close_all()
         print("\n" + "="*60)
         print("PROGRAM COMPLETED")
         print("="*60)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
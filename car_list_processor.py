@@ -3,118 +3,837 @@ Car List Processor - Loads car list from JSON and processes each car
 WITHOUT CLICKING ANY LINKS
 """
 
+import os
 import json
 import time
 import re
+import hashlib
+import queue
+import asyncio
+import threading
+from functools import lru_cache
+from contextlib import contextmanager
+import requests
+from urllib.parse import urlsplit, urlunsplit, urlencode, parse_qsl
+from base import dump_json_bytes
+from http_client import STATIC_HEADERS, make_http_session
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import xxhash
+except ImportError:  # blake2b gives the same stability, just slower
+    xxhash = None
+
+try:
+    import lxml.html
+    from lxml.cssselect import CSSSelector
+except ImportError:  # offline parsing is optional, live element access still works
+    lxml = None
+
+try:
+    from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+except ImportError:  # JS-built pages then go through the Selenium pool only
+    async_playwright = None
+
+
+# Any of these means the trim cards have started rendering
+TRIM_CARD_READY_SELECTOR = '.sc-hEJUTg.ceCyPE, [class*="trim-card"], [class*="vehicle-card"]'
+
+# Every validated trim is appended here as soon as it is scraped; the pretty
+# JSON files are built from it at the end, and it survives an interrupted run
+TRIM_SPILL_FILE = "nissan_trims.ndjson"
+
+# The build configurator's view of each trim, appended one line per trim so
+# it can start on the links while scraping goes on. The legacy JSON array is
+# written from it at the end for the tools that still load that file.
+TRIM_SIMPLE_STREAM_FILE = "nissan_trims_simple.jsonl"
+TRIM_SIMPLE_FILE = "nissan_trims_simple.json"
+
+# Keys kept in the simplified trim files
+TRIM_SIMPLE_FIELDS = (
+    'id', 'car_name', 'model_name', 'trim_name', 'year', 'price',
+    'page_link', 'image_url', 'specs', 'card_unique_id'
+)
+
+# Car pages finished so far, one URL per line; lets an interrupted run resume
+PROCESSED_LINKS_FILE = "processed_links.txt"
+
+# The output files above are written by one background thread in batches:
+# whatever arrived within this many seconds, or this many trims, per write
+OUTPUT_FLUSH_INTERVAL = 0.2
+OUTPUT_FLUSH_TRIMS = 64
+
+# Set on a tab's old document right before it navigates away, so a wait can
+# tell the next page apart from the one it is replacing
+TAB_NAVIGATE_JS = "window.__scraperLeaving = true; window.location.href = arguments[0];"
+TAB_READY_JS = "return !window.__scraperLeaving && !!document.querySelector(arguments[0]);"
+
+# "2024 Nissan Altima S" -> year, model, trim
+_NAME_RE = re.compile(r'(\d{4})\s+(.+?)\s+(.+)')
+_YEAR_RE = re.compile(r'(20\d{2})')
+
+# Per-field selector fallbacks, tried in order (the first one that matches wins)
+NAME_SELECTORS = [
+    'h3.sc-gLaqbQ.eDBrkr.sc-eQwNpu.kogNIX.sc-Goufe.bwIAyQ',  # Your exact class
+    'h3',  # Fallback
+    '.vehicle-name',
+    '.model-name',
+    '[class*="title"]',
+    '[class*="name"]'
+]
+
+VALIDATION_LINK_SELECTORS = [
+    'a.sc-fhHczv.buKfDP.sc-kEjqvK.kDaJzo',  # Your exact class
+    'a[href*="nissan"]',
+    'a[href*="build"]',
+    'a'
+]
+
+LINK_SELECTORS = [
+    'a.sc-fhHczv.buKfDP.sc-kEjqvK.kDaJzo',
+    'a[class*="sc-fhHczv"]',
+    'a[href*="nissan"]',
+    'a[href]'
+]
+
+IMAGE_SELECTORS = [
+    'img.sc-cdmAjP',  # Your exact class
+    'img',
+    '[class*="image"] img',
+    'picture img'
+]
+
+PRICE_SELECTORS = [
+    '.sc-clirCP.HQxrh',  # Your exact price class
+    '[class*="price"]',
+    '.price',
+    '.msrp',
+    '[data-testid*="price"]'
+]
+
+SPECS_SELECTORS = [
+    '[class*="drivetrain"]',
+    '[class*="engine"]',
+    '[class*="spec"]'
+]
+
+# Field -> selector fallbacks, as handed to CARD_SNAPSHOT_JS
+CARD_FIELD_SELECTORS = {
+    'name': NAME_SELECTORS,
+    'validation_link': VALIDATION_LINK_SELECTORS,
+    'link': LINK_SELECTORS,
+    'image': IMAGE_SELECTORS,
+    'price': PRICE_SELECTORS,
+    'specs': SPECS_SELECTORS,
+}
+
+# Same selectors compiled once for the offline (lxml) path; translating CSS
+# to XPath on every card costs more than evaluating it
+if lxml is not None:
+    STATIC_TRIM_CARD_READY = CSSSelector(TRIM_CARD_READY_SELECTOR)
+    STATIC_CARD_FIELD_SELECTORS = {
+        field: [CSSSelector(selector) for selector in selectors]
+        for field, selectors in CARD_FIELD_SELECTORS.items()
+    }
+
+# Runs in the browser with the card as arguments[0] and CARD_FIELD_SELECTORS
+# as arguments[1], so a card costs one WebDriver round-trip. Each field takes
+# the first selector in its list that matches, not the first element on the page.
+CARD_SNAPSHOT_JS = r"""
+const card = arguments[0], sel = arguments[1];
+const firstText = (selectors, maxLen) => {
+    for (const selector of selectors) {
+        for (const e of card.querySelectorAll(selector)) {
+            const text = (e.innerText || '').trim();
+            if (text && (!maxLen || text.length < maxLen)) return text;
+        }
+    }
+    return '';
+};
+const firstLink = selectors => {
+    for (const selector of selectors) {
+        for (const e of card.querySelectorAll(selector)) {
+            const href = e.href || e.getAttribute('href');
+            if (href && (href.includes('nissan') || href.includes('http'))) return href;
+        }
+    }
+    return '';
+};
+let imageSrc = '', imageSrcset = '';
+imageSearch:
+for (const selector of sel.image) {
+    for (const e of card.querySelectorAll(selector)) {
+        imageSrc = e.src || e.getAttribute('src') || '';
+        imageSrcset = e.getAttribute('srcset') || '';
+        if (imageSrc || imageSrcset) break imageSearch;
+    }
+}
+const rect = card.getBoundingClientRect();
+return {
+    displayed: !!(card.offsetWidth || card.offsetHeight || card.getClientRects().length),
+    text: (card.innerText || '').trim(),
+    name: firstText(sel.name),
+    validation_link: firstLink(sel.validation_link),
+    page_link: firstLink(sel.link),
+    image_src: imageSrc,
+    image_srcset: imageSrcset,
+    price: firstText(sel.price),
+    specs: firstText(sel.specs, 50),
+    data_testid: card.getAttribute('data-testid'),
+    id: card.getAttribute('id'),
+    data_id: card.getAttribute('data-id'),
+    classes: card.getAttribute('class') || '',
+    x: rect.left + window.scrollX,
+    y: rect.top + window.scrollY
+};
+"""
+
+
+def _stable_hash(text):
+    """64-bit hash that, unlike hash(), is the same in every run"""
+    data = text.encode('utf-8')
+    if xxhash is not None:
+        return xxhash.xxh64_intdigest(data)
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+
+def make_page_renderer(max_pages=8, headless=True):
+    """Playwright renderer for JS-built car pages (None if playwright/lxml are missing)"""
+    if async_playwright is None or lxml is None:
+        return None
+    return PlaywrightRenderer(max_pages, headless)
+
+
+class PlaywrightRenderer:
+    """One Chromium rendering many car pages at once, each in its own context
+    
+    Lives on the event loop (no thread per browser); the rendered HTML goes
+    through the same lxml extraction as the static path. start() before use,
+    close() afterwards.
+    """
+    
+    # Not needed to read the DOM
+    BLOCKED_RESOURCE_TYPES = frozenset(('image', 'media', 'font'))
+    
+    def __init__(self, max_pages=8, headless=True):
+        self.headless = headless
+        self._slots = asyncio.Semaphore(max_pages)
+        self._playwright = None
+        self._browser = None
+    
+    async def start(self):
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=self.headless)
+    
+    async def close(self):
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+    
+    async def _route(self, route):
+        if route.request.resource_type in self.BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+        else:
+            await route.continue_()
+    
+    async def render(self, url, ready_selector=None, timeout=10):
+        """Load url and return (html, final_url) once ready_selector shows up (or timeout s)"""
+        async with self._slots:
+            context = await self._browser.new_context(user_agent=STATIC_HEADERS['User-Agent'])
+            try:
+                await context.route('**/*', self._route)
+                page = await context.new_page()
+                await page.goto(url, wait_until='domcontentloaded', timeout=timeout * 1000)
+                if ready_selector:
+                    try:
+                        await page.wait_for_selector(ready_selector, state='attached', timeout=timeout * 1000)
+                    except PlaywrightTimeoutError:
+                        pass  # parse whatever rendered
+                return await page.content(), page.url
+            finally:
+                await context.close()
+
+
+def _same_page(url_a, url_b):
+    """True if both URLs point at the same page (see _canonical_url)
+    
+    The query is part of the page: car links differ only in ?models=...
+    """
+    return _canonical_url(url_a) == _canonical_url(url_b)
+
+
+def _canonical_url(url):
+    """Key for spotting the same page behind different spellings of its URL
+    
+    Lowercases the host, drops the fragment and trailing slash and sorts the
+    query, so a car linked from several places is only processed once.
+    """
+    parts = urlsplit(url)
+    return urlunsplit((
+        parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'),
+        urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True))), ''
+    ))
+
+
+@lru_cache(maxsize=None)
+def _static_selector(selector):
+    """CSSSelector for a card selector, compiled on first use and then reused"""
+    return CSSSelector(selector)
+
+
+def _static_text(element):
+    """Approximate innerText for an lxml element: one line per text node"""
+    return '\n'.join(t.strip() for t in element.itertext() if t.strip())
+
+
+def _static_hidden(element):
+    """Offline stand-in for is_displayed(): only inline styles can be checked"""
+    for node in [element] + list(element.iterancestors()):
+        style = (node.get('style') or '').replace(' ', '').lower()
+        if 'display:none' in style or 'visibility:hidden' in style:
+            return True
+        if node.get('hidden') is not None:
+            return True
+    return False
+
+
+def simplify_trim(trim):
+    """Build-configurator view of a trim, or None if it lacks a name or link"""
+    # Only trims that passed validate_trim_data at extraction time get here
+    simple_trim = {k: trim.get(k, '') for k in TRIM_SIMPLE_FIELDS}
+    simple_trim['id'] = trim.get('id')
+    
+    # Validate each field is not empty where required
+    if simple_trim['car_name'] and simple_trim['page_link']:
+        return simple_trim
+    return None
 
 
 class CarListProcessor:
-    def __init__(self, scraper_instance):
-        self.scraper = scraper_instance
-        self.driver = scraper_instance.driver
-        self.wait = scraper_instance.wait
-        self.all_trim_data = []
-        self.processed_car_links = set()  # Track processed car links
+    def __init__(self, scraper_instance, resume=False, check_links=False, cache=None, ctx=None):
+        self._main_scraper = scraper_instance
+        self._local = threading.local()  # pool workers bind their own scraper here
+        self._results_lock = threading.Lock()
+        self._spill = None
+        self._simple_spill = None
+        self._processed_log = None
+        self._output_queue = None
+        self.resume = resume
+        self.check_links = check_links
+        self.cache = cache  # optional diskcache.Cache of static car pages, keyed by URL
+        self.trim_count = 0
+        self.simple_count = 0
+        
+        # One pooled session for link checks so TCP/TLS connections are reused;
+        # a WorkflowContext's is shared with the other steps (and closed by it)
+        self._owns_http = ctx is None
+        self._http = make_http_session() if ctx is None else ctx.http
+        self.processed_car_links = set()  # Track processed car links (by _canonical_url)
+        self._claimed_links = set()  # links handed to a worker this run (same keys)
+        
+        # Pick up where the last run stopped: its links are skipped and its
+        # trims stay in the NDJSON stream
+        if resume and os.path.exists(PROCESSED_LINKS_FILE):
+            with open(PROCESSED_LINKS_FILE, 'r', encoding='utf-8') as f:
+                self.processed_car_links = set(_canonical_url(line) for line in f.read().splitlines() if line)
+            if os.path.exists(TRIM_SPILL_FILE):
+                self.trim_count = sum(1 for _ in self.iter_spilled_trims())
+            if os.path.exists(TRIM_SIMPLE_STREAM_FILE):
+                self.simple_count = sum(1 for _ in self.iter_spilled_trims(TRIM_SIMPLE_STREAM_FILE))
+    
+    @property
+    def scraper(self):
+        """Scraper owned by the current thread (the one passed in, outside a pool)"""
+        return getattr(self._local, 'scraper', self._main_scraper)
+    
+    @property
+    def driver(self):
+        return self.scraper.driver
+    
+    @property
+    def wait(self):
+        return self.scraper.wait
     
     def load_car_list(self, filename="nissan_car_list.json"):
         """Load car list from JSON file"""
         try:
+            if orjson is not None:
+                with open(filename, 'rb') as f:
+                    return orjson.loads(f.read())
             with open(filename, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except FileNotFoundError:
             print(f"❌ File {filename} not found!")
             return []
     
+    def iter_spilled_trims(self, filename=TRIM_SPILL_FILE):
+        """Yield the trims written to the NDJSON stream, one at a time"""
+        loads = orjson.loads if orjson is not None else json.loads
+        with open(filename, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield loads(line)
+    
     def process_car_links(self):
         """Process each car link WITHOUT clicking any trim links"""
+        jobs = self._load_jobs()
+        if jobs is None:
+            return
+        
+        with self.streaming_output():
+            for job in jobs:
+                self._process_car(job)
+        
+        # Save all trim data
+        if self.trim_count:
+            self.save_trim_data()
+    
+    def process_car_links_parallel(self, driver_pool, max_workers=None):
+        """Process the car list across an already started BrowserPool
+        
+        Each worker borrows one headless browser per car and returns it
+        afterwards; the caller owns (and closes) the pool.
+        """
+        jobs = self._load_jobs()
+        if jobs is None:
+            return
+        
+        with self.streaming_output():
+            driver_pool.map(
+                lambda scraper, job: self.run_on_scraper(scraper, self._process_car, job),
+                jobs,
+                max_workers=max_workers
+            )
+        
+        # Save all trim data
+        if self.trim_count:
+            self.save_trim_data()
+    
+    def _load_jobs(self):
+        """Load the car list and claim the links to process as (idx, car) jobs"""
         car_list = self.load_car_list()
         
         if not car_list:
             print("No car list found. Please run the main scraper first.")
-            return
+            return None
+        
+        if self.processed_car_links:
+            total = len(car_list)
+            car_list = [
+                car for car in car_list
+                if _canonical_url(car.get('page_link') or '') not in self.processed_car_links
+            ]
+            print(f"Resuming: {total - len(car_list)} car(s) already processed in a previous run")
         
         print(f"\n{'='*60}")
         print(f"PROCESSING {len(car_list)} CARS (NO CLICK MODE)")
         print(f"{'='*60}\n")
         
-        for idx, car in enumerate(car_list, 1):
-            page_link = car.get('page_link')
+        # Skips are decided up front so parallel workers never share a link
+        return [(idx, car) for idx, car in enumerate(car_list, 1) if self._claim_link(idx, car)]
+    
+    @contextmanager
+    def streaming_output(self):
+        """Keep the NDJSON trim stream and processed-link log open for a run"""
+        # Trims are streamed to disk as they are found (appended when resuming)
+        mode = 'a' if self.resume else 'w'
+        self._spill = open(TRIM_SPILL_FILE, mode + 'b')
+        self._simple_spill = open(TRIM_SIMPLE_STREAM_FILE, mode + 'b')
+        self._processed_log = open(PROCESSED_LINKS_FILE, mode, encoding='utf-8')
+        self._output_queue = queue.Queue()
+        writer = threading.Thread(target=self._write_output, daemon=True)
+        writer.start()
+        try:
+            yield self
+        except BaseException:
+            if self.trim_count:
+                print(f"Partial trim data kept in {TRIM_SPILL_FILE} ({self.trim_count} trims)")
+            raise
+        finally:
+            # Everything queued so far still reaches the disk
+            self._output_queue.put(None)
+            writer.join()
+            self._output_queue = None
+            self._spill.close()
+            self._spill = None
+            self._simple_spill.close()
+            self._simple_spill = None
+            self._processed_log.close()
+            self._processed_log = None
+    
+    def _write_output(self):
+        """Writer thread for streaming_output: one write (and flush) per file per batch"""
+        trim_lines, simple_lines, links = [], [], []
+        deadline = None
+        
+        while True:
+            # Idle until something arrives, then collect until the batch is due
+            timeout = None if deadline is None else max(0, deadline - time.monotonic())
+            try:
+                item = self._output_queue.get(timeout=timeout)
+            except queue.Empty:
+                item = ()
             
-            if not page_link or page_link == 'No link':
-                print(f"{idx:3d}. Skipping: {car.get('name')} - No link")
-                continue
+            if item:
+                page_link, trims, simple_trims = item
+                trim_lines.extend(trims)
+                simple_lines.extend(simple_trims)
+                links.append(page_link)
+                if deadline is None:
+                    deadline = time.monotonic() + OUTPUT_FLUSH_INTERVAL
             
-            # Skip if already processed
-            if page_link in self.processed_car_links:
-                print(f"{idx:3d}. Skipping: {car.get('name')} - Already processed")
-                continue
-            
-            print(f"{idx:3d}. Processing: {car.get('name')}")
-            print(f"    Link: {page_link[:80]}...")
+            if links and (item is None or len(trim_lines) >= OUTPUT_FLUSH_TRIMS
+                          or time.monotonic() >= deadline):
+                self._spill.write(b''.join(trim_lines))
+                self._spill.flush()
+                self._simple_spill.write(b''.join(simple_lines))
+                self._simple_spill.flush()
+                
+                # Only mark links done once their trims are on disk
+                self._processed_log.write(''.join(link + '\n' for link in links))
+                self._processed_log.flush()
+                
+                trim_lines, simple_lines, links = [], [], []
+                deadline = None
             
-            # Process the car page WITHOUT clicking any links
+            if item is None:
+                return
+    
+    def run_on_scraper(self, scraper, func, *args):
+        """Call func(*args) with this thread bound to scraper's browser (pool workers)"""
+        self._local.scraper = scraper
+        try:
+            return func(*args)
+        finally:
+            del self._local.scraper
+    
+    def _claim_link(self, idx, car):
+        """Reserve a car's link for this run; False (after saying why) if it is skipped"""
+        page_link = car.get('page_link')
+        
+        if not page_link or page_link == 'No link':
+            print(f"{idx:3d}. Skipping: {car.get('name')} - No link")
+            return False
+        
+        # Skip if already processed, or already queued under another spelling
+        link_key = _canonical_url(page_link)
+        with self._results_lock:
+            if link_key in self.processed_car_links or link_key in self._claimed_links:
+                print(f"{idx:3d}. Skipping: {car.get('name')} - Already processed")
+                return False
+            self._claimed_links.add(link_key)
+        
+        return True
+    
+    def process_car_links_in_tabs(self, tabs=4):
+        """Process the car list in ONE browser, loading upcoming cars in extra tabs
+        
+        While the current tab is parsed, the other tabs are already fetching
+        their pages, so navigation overlaps with extraction without the cost
+        of more browser processes.
+        """
+        jobs = self._load_jobs()
+        if jobs is None:
+            return
+        
+        pending = iter(jobs)
+        handles = self._open_tabs(max(1, min(tabs, len(jobs))))
+        loading = {}  # window handle -> job being loaded there
+        
+        def start_next(handle):
+            job = next(pending, None)
+            if job is None:
+                loading.pop(handle, None)
+                return
+            self.driver.switch_to.window(handle)
+            if not _same_page(self.driver.current_url, job[1]['page_link']):
+                # Fire and forget; unlike get() this does not wait for the page
+                self.driver.execute_script(TAB_NAVIGATE_JS, job[1]['page_link'])
+            loading[handle] = job
+        
+        try:
+            with self.streaming_output():
+                for handle in handles:
+                    start_next(handle)
+                
+                # Visit the tabs round-robin: each is processed, then refilled
+                while loading:
+                    for handle in list(loading):
+                        job = loading[handle]
+                        self.driver.switch_to.window(handle)
+                        try:
+                            WebDriverWait(self.driver, 10, poll_frequency=0.1).until(
+                                lambda d: d.execute_script(TAB_READY_JS, TRIM_CARD_READY_SELECTOR)
+                            )
+                        except TimeoutException:
+                            pass
+                        self._process_car(job, page_loaded=True)
+                        start_next(handle)
+        finally:
+            self._close_tabs(handles)
+        
+        # Save all trim data
+        if self.trim_count:
+            self.save_trim_data()
+    
+    def _open_tabs(self, n):
+        """Open tabs until the browser has n of them; returns their window handles"""
+        while len(self.driver.window_handles) < n:
+            self.driver.switch_to.new_window('tab')
+        return self.driver.window_handles[:n]
+    
+    def _close_tabs(self, handles):
+        """Close every tab but the first and switch back to it"""
+        for handle in handles[1:]:
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            except Exception:
+                pass
+        self.driver.switch_to.window(handles[0])
+    
+    def _process_car(self, job, page_loaded=False):
+        """Scrape one car page and record its trims
+        
+        page_loaded=True means the page is already open in the current window.
+        """
+        idx, car = job
+        page_link = car['page_link']
+        
+        print(f"{idx:3d}. Processing: {car.get('name')}")
+        print(f"    Link: {page_link[:80]}...")
+        
+        # Process the car page WITHOUT clicking any links
+        if page_loaded:
+            trim_data = self._scrape_loaded_car_page(car)
+        else:
             trim_data = self.scrape_car_details_without_clicks(page_link, car)
-            
+        
+        self._record_trims(page_link, trim_data)
+    
+    async def process_single_link_async(self, car, client, driver_pool, renderer=None):
+        """Pipeline consumer: try the car page over plain HTTP first and only
+        borrow a browser from driver_pool when the trims are rendered by JS
+        
+        With a PlaywrightRenderer, JS-built pages are rendered there first and
+        the Selenium pool is only the last resort.
+        Must run inside streaming_output(); call save_trim_data() afterwards.
+        """
+        idx = car.get('id', 0)
+        if not self._claim_link(idx, car):
+            return
+        job = (idx, car)
+        
+        # The fetched HTML needs lxml to be of any use
+        if client is not None and lxml is not None:
+            trim_data = await self._fetch_static_trims(client, car)
+            if trim_data:
+                print(f"{idx:3d}. Processed from static HTML: {car.get('name')}")
+                self._record_trims(car['page_link'], trim_data)
+                return
+        
+        if renderer is not None:
+            trim_data = await self._render_trims(renderer, car)
             if trim_data:
-                print(f"    ✓ Found {len(trim_data)} trim(s) (no clicks made)")
-                self.all_trim_data.extend(trim_data)
-                self.processed_car_links.add(page_link)
+                print(f"{idx:3d}. Processed with Playwright: {car.get('name')}")
+                self._record_trims(car['page_link'], trim_data)
+                return
+        
+        await asyncio.to_thread(
+            driver_pool.run,
+            lambda scraper, job: self.run_on_scraper(scraper, self._process_car, job),
+            job
+        )
+    
+    async def _fetch_static_trims(self, client, car):
+        """Fetch a car page without a browser and extract its trims (None if JS is needed)
+        
+        With a cache, the request is conditional (ETag / Last-Modified) and a
+        304 reuses the trims parsed last time.
+        """
+        page_link = car['page_link']
+        cached = self.cache.get(page_link) if self.cache is not None else None
+        
+        headers = {}
+        if cached and cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached and cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+        
+        try:
+            response = await client.get(page_link, headers=headers)
+            if response.status_code == 304 and cached:
+                # Same page as last run: nothing to parse unless the car entry changed
+                if cached['car'] == car:
+                    print(f"      ✓ Page unchanged since last run, using cached trims")
+                    return cached['trims']
+                html, base_url = cached['html'], cached['url']
             else:
-                print(f"    ⚠ No trim data found")
+                response.raise_for_status()
+                html, base_url = response.text, str(response.url)
+        except Exception:
+            return None
+        
+        # Off the event loop: parsing is CPU-bound and --check-links sends
+        # blocking HEAD requests for every trim
+        trim_data = await asyncio.to_thread(self._trims_from_html, html, base_url, car)
+        
+        etag = response.headers.get('ETag') or (cached['etag'] if cached else None)
+        last_modified = response.headers.get('Last-Modified') or (cached['last_modified'] if cached else None)
+        if trim_data and self.cache is not None and (etag or last_modified):
+            self.cache.set(page_link, {
+                'etag': etag,
+                'last_modified': last_modified,
+                'url': base_url,
+                'html': html,
+                'car': car,
+                'trims': trim_data,
+            })
+        
+        return trim_data
+    
+    async def _render_trims(self, renderer, car):
+        """Render a JS-built car page with Playwright and extract its trims (None on failure)"""
+        try:
+            html, base_url = await renderer.render(car['page_link'], TRIM_CARD_READY_SELECTOR)
+        except Exception as e:
+            print(f"      ⚠ Playwright render failed: {str(e)[:50]}")
+            return None
+        return await asyncio.to_thread(self._trims_from_html, html, base_url, car)
+    
+    def _trims_from_html(self, html, base_url, car):
+        """Parse a car page's HTML with lxml and extract its trims (None if it has no trim cards)"""
+        try:
+            tree = lxml.html.fromstring(html, base_url=base_url)
+            tree.make_links_absolute(handle_failures='ignore')
+        except Exception:
+            return None
+        
+        # Sentinel: no trim cards in the HTML means the page is (still) built client-side
+        if not STATIC_TRIM_CARD_READY(tree):
+            return None
+        
+        trim_cards = self.find_trim_cards_without_clicks(tree)
+        return self._extract_trims(trim_cards, car) or None
+    
+    def _record_trims(self, page_link, trim_data):
+        """Stream a car's trims to disk and mark its link as processed"""
+        if trim_data:
+            print(f"    ✓ Found {len(trim_data)} trim(s) (no clicks made)")
+            trims = [dump_json_bytes(trim, indent=False) + b'\n' for trim in trim_data]
+            simple_trims = [
+                dump_json_bytes(simple_trim, indent=False) + b'\n'
+                for simple_trim in map(simplify_trim, trim_data) if simple_trim is not None
+            ]
             
-            print()
+            # The writer thread batches these with other cars' trims
+            self._output_queue.put((page_link, trims, simple_trims))
+            with self._results_lock:
+                self.trim_count += len(trims)
+                self.simple_count += len(simple_trims)
+                self.processed_car_links.add(_canonical_url(page_link))
+        else:
+            print(f"    ⚠ No trim data found")
         
-        # Save all trim data
-        if self.all_trim_data:
-            self.save_trim_data()
+        print()
     
     def scrape_car_details_without_clicks(self, page_link, base_car_info):
         """Scrape trim details from car page WITHOUT clicking any links"""
         try:
-            # Navigate to car page
-            self.driver.get(page_link)
-            time.sleep(3)
-            
+            # Navigate to car page, unless the previous car left us on it
+            if _same_page(self.driver.current_url, page_link):
+                print("      Already on this page, skipping navigation")
+            else:
+                self.scraper._load_page(page_link)
+                
+                # Wait for the first trim card rather than a fixed 3s sleep
+                try:
+                    WebDriverWait(self.driver, 10, poll_frequency=0.1).until(EC.presence_of_element_located(
+                        (By.CSS_SELECTOR, TRIM_CARD_READY_SELECTOR)
+                    ))
+                except TimeoutException:
+                    print("      ⚠ Trim cards did not appear in time, continuing...")
+        except Exception as e:
+            print(f"    ✗ Error processing page: {str(e)[:50]}")
+            return []
+        
+        return self._scrape_loaded_car_page(base_car_info)
+    
+    def _scrape_loaded_car_page(self, base_car_info):
+        """Extract trims from the car page already open in the current window"""
+        try:
             # Handle popups
             self.scraper._handle_cookies_popup()
             self.scraper._close_popups()
             
             # Scroll to load content (but don't click anything)
-            self.scraper._scroll_page_gradually()
+            self.scraper._fast_scroll_to_load(TRIM_CARD_READY_SELECTOR)
+            
+            # Nothing is clicked, so one HTML snapshot is enough for every card
+            tree = self._page_tree()
             
             # Find all trim cards WITHOUT clicking
-            trim_cards = self.find_trim_cards_without_clicks()
+            trim_cards = self.find_trim_cards_without_clicks(tree)
             
             if not trim_cards:
                 print("      ⚠ No trim cards found, trying alternative selectors...")
-                trim_cards = self.find_trim_cards_alternative_without_clicks()
-            
-            trim_data = []
+                trim_cards = self.find_trim_cards_alternative_without_clicks(tree)
             
-            for card_idx, card in enumerate(trim_cards, 1):
-                try:
-                    # Extract trim info WITHOUT clicking
-                    trim_info = self.extract_trim_info_without_clicks(card, base_car_info, card_idx)
-                    if trim_info and self.validate_trim_data(trim_info):
-                        trim_data.append(trim_info)
-                        print(f"      ✓ Trim {card_idx}: {trim_info.get('trim_name', 'Unknown')}")
-                    else:
-                        print(f"      ✗ Trim {card_idx}: Failed validation")
-                        
-                except Exception as e:
-                    print(f"      ✗ Error with trim {card_idx}: {str(e)[:50]}")
-                    continue
-            
-            return trim_data
+            return self._extract_trims(trim_cards, base_car_info)
             
         except Exception as e:
             print(f"    ✗ Error processing page: {str(e)[:50]}")
             return []
     
-    def find_trim_cards_without_clicks(self):
-        """Find trim cards WITHOUT clicking"""
+    def _extract_trims(self, trim_cards, base_car_info):
+        """Turn validated (card, snapshot) pairs into validated trim dicts"""
+        trim_data = []
+        
+        for card_idx, (card, snapshot) in enumerate(trim_cards, 1):
+            try:
+                # Extract trim info WITHOUT clicking (reusing the validation snapshot)
+                trim_info = self.extract_trim_info_without_clicks(card, base_car_info, card_idx, snapshot)
+                if trim_info and self.validate_trim_data(trim_info):
+                    trim_data.append(trim_info)
+                    print(f"      ✓ Trim {card_idx}: {trim_info.get('trim_name', 'Unknown')}")
+                else:
+                    print(f"      ✗ Trim {card_idx}: Failed validation")
+                    
+            except Exception as e:
+                print(f"      ✗ Error with trim {card_idx}: {str(e)[:50]}")
+                continue
+        
+        return trim_data
+    
+    def _page_tree(self):
+        """Parse the rendered page once with lxml (None if unavailable)"""
+        if lxml is None:
+            return None
+        try:
+            tree = lxml.html.fromstring(self.driver.page_source, base_url=self.driver.current_url)
+            tree.make_links_absolute(handle_failures='ignore')
+            return tree
+        except Exception as e:
+            print(f"      ⚠ Could not parse page source, using live elements: {e}")
+            return None
+    
+    def _find_cards(self, selector, tree=None):
+        """Find cards in the parsed page if we have one, otherwise in the browser"""
+        if tree is not None:
+            return _static_selector(selector)(tree)
+        return self.driver.find_elements(By.CSS_SELECTOR, selector)
+    
+    def find_trim_cards_without_clicks(self, tree=None):
+        """Find trim cards WITHOUT clicking, as (card, snapshot) pairs"""
         all_cards = []
         
         # Primary selector from requirements
@@ -130,14 +849,15 @@ class CarListProcessor:
         
         for selector in primary_selectors:
             try:
-                cards = self.driver.find_elements(By.CSS_SELECTOR, selector)
+                cards = self._find_cards(selector, tree)
                 if cards:
                     print(f"      Found {len(cards)} cards with selector: {selector}")
                     
                     validated_cards = []
                     for idx, card in enumerate(cards):
-                        if self.is_valid_trim_card_without_clicks(card):
-                            validated_cards.append(card)
+                        card, snapshot = self._card_snapshot_with_rebind(card, selector, idx)
+                        if snapshot and self.is_valid_trim_card_without_clicks(card, snapshot):
+                            validated_cards.append((card, snapshot))
                             print(f"        Card {idx+1}: Valid")
                         else:
                             print(f"        Card {idx+1}: Invalid - skipping")
@@ -152,8 +872,8 @@ class CarListProcessor:
         
         return []
     
-    def find_trim_cards_alternative_without_clicks(self):
-        """Find trim cards using alternative selectors WITHOUT clicking"""
+    def find_trim_cards_alternative_without_clicks(self, tree=None):
+        """Find trim cards using alternative selectors WITHOUT clicking, as (card, snapshot) pairs"""
         alternative_selectors = [
             '.model-card',
             '.car-card',
@@ -168,14 +888,15 @@ class CarListProcessor:
         
         for selector in alternative_selectors:
             try:
-                cards = self.driver.find_elements(By.CSS_SELECTOR, selector)
+                cards = self._find_cards(selector, tree)
                 if cards:
                     print(f"      Found {len(cards)} cards with alternative selector: {selector}")
                     
                     validated_cards = []
-                    for card in cards:
-                        if self.is_valid_trim_card_without_clicks(card):
-                            validated_cards.append(card)
+                    for idx, card in enumerate(cards):
+                        card, snapshot = self._card_snapshot_with_rebind(card, selector, idx)
+                        if snapshot and self.is_valid_trim_card_without_clicks(card, snapshot):
+                            validated_cards.append((card, snapshot))
                     
                     if validated_cards:
                         print(f"      Valid alternative cards: {len(validated_cards)}")
@@ -186,159 +907,155 @@ class CarListProcessor:
         
         return []
     
-    def is_valid_trim_card_without_clicks(self, card):
+    def _card_snapshot(self, card):
+        """Read everything needed from a card in one execute_script round-trip"""
+        if lxml is not None and isinstance(card, lxml.html.HtmlElement):
+            return self._static_card_snapshot(card)
+        return self.driver.execute_script(CARD_SNAPSHOT_JS, card, CARD_FIELD_SELECTORS)
+    
+    def _card_snapshot_with_rebind(self, card, selector, idx):
+        """Snapshot a card, re-finding it once by selector/index if it went stale"""
+        for attempt in range(2):
+            try:
+                return card, self._card_snapshot(card)
+            except StaleElementReferenceException:
+                # The page re-rendered under us: look the card up again
+                if attempt:
+                    break
+                cards = self.driver.find_elements(By.CSS_SELECTOR, selector)
+                if idx >= len(cards):
+                    break
+                card = cards[idx]
+            except Exception as e:
+                print(f"        ⚠ Card validation error: {e}")
+                return card, None
+        
+        print(f"        ⚠ Card {idx+1} went stale and could not be re-found")
+        return card, None
+    
+    def _static_card_snapshot(self, card):
+        """Same snapshot as CARD_SNAPSHOT_JS, built from the parsed page source"""
+        def elements(field):
+            for selector in STATIC_CARD_FIELD_SELECTORS[field]:
+                yield from selector(card)
+        
+        def first_text(field, max_len=None):
+            for el in elements(field):
+                text = ' '.join(el.text_content().split())
+                if text and (not max_len or len(text) < max_len):
+                    return text
+            return ''
+        
+        def first_link(field):
+            for el in elements(field):
+                href = el.get('href') or ''
+                if href and ('nissan' in href or 'http' in href):
+                    return href
+            return ''
+        
+        image_src = image_srcset = ''
+        for img in elements('image'):
+            image_src = img.get('src') or ''
+            image_srcset = img.get('srcset') or ''
+            if image_src or image_srcset:
+                break
+        
+        return {
+            'displayed': not _static_hidden(card),
+            'text': _static_text(card),
+            'name': first_text('name'),
+            'validation_link': first_link('validation_link'),
+            'page_link': first_link('link'),
+            'image_src': image_src,
+            'image_srcset': image_srcset,
+            'price': first_text('price'),
+            'specs': first_text('specs', 50),
+            'data_testid': card.get('data-testid'),
+            'id': card.get('id'),
+            'data_id': card.get('data-id'),
+            'classes': card.get('class') or '',
+            # No layout offline; the element's path plays the role of position
+            'path': card.getroottree().getpath(card),
+        }
+    
+    def is_valid_trim_card_without_clicks(self, card, snapshot=None):
         """Validate trim card WITHOUT clicking"""
         try:
+            if snapshot is None:
+                snapshot = self._card_snapshot(card)
+            
             # Basic visibility check
-            if not card.is_displayed():
+            if not snapshot['displayed']:
                 return False
             
             # Get card text
-            card_text = card.text.strip()
+            card_text = snapshot['text']
             if len(card_text) < 10:
                 return False
             
             # Check for required elements WITHOUT clicking
             
             # 1. Name element (h3 with specific classes from requirements)
-            name_selectors = [
-                'h3.sc-gLaqbQ.eDBrkr.sc-eQwNpu.kogNIX.sc-Goufe.bwIAyQ',  # Your exact class
-                'h3',  # Fallback
-                '.vehicle-name',
-                '.model-name',
-                '[class*="title"]',
-                '[class*="name"]'
-            ]
-            
-            has_name = False
-            for selector in name_selectors:
-                try:
-                    name_elem = card.find_element(By.CSS_SELECTOR, selector)
-                    if name_elem.text.strip():
-                        has_name = True
-                        break
-                except:
-                    continue
-            
+            has_name = bool(snapshot['name'])
             if not has_name:
                 return False
             
             # 2. Link element (a tag with specific classes from requirements)
-            link_selectors = [
-                'a.sc-fhHczv.buKfDP.sc-kEjqvK.kDaJzo',  # Your exact class
-                'a[href*="nissan"]',
-                'a[href*="build"]',
-                'a'
-            ]
-            
-            has_link = False
-            for selector in link_selectors:
-                try:
-                    link_elem = card.find_element(By.CSS_SELECTOR, selector)
-                    href = link_elem.get_attribute('href')
-                    if href and ('nissan' in href or 'http' in href):
-                        has_link = True
-                        break
-                except:
-                    continue
-            
+            has_link = bool(snapshot['validation_link'])
             if not has_link:
                 return False
             
-            # 3. Image element (optional but preferred)
-            has_image = False
-            try:
-                img_elem = card.find_element(By.TAG_NAME, 'img')
-                src = img_elem.get_attribute('src')
-                if src:
-                    has_image = True
-            except:
-                # Image not required but preferred
-                pass
-            
-            # 4. Price element (optional)
-            has_price = False
-            price_selectors = [
-                '[class*="price"]',
-                '.price',
-                '.msrp',
-                '[class*="Price"]'
-            ]
-            
-            for selector in price_selectors:
-                try:
-                    price_elem = card.find_element(By.CSS_SELECTOR, selector)
-                    if price_elem.text.strip():
-                        has_price = True
-                        break
-                except:
-                    continue
-            
-            # Final validation: Must have name and link, prefer image and price
-            return has_name and has_link
+            # Must have name and link; image and price are optional
+            return True
             
         except Exception as e:
             print(f"        ⚠ Card validation error: {e}")
             return False
     
-    def extract_trim_info_without_clicks(self, card, base_car_info, card_idx):
+    def extract_trim_info_without_clicks(self, card, base_car_info, card_idx, snapshot=None):
         """Extract trim info WITHOUT clicking any links"""
         trim_info = base_car_info.copy()
         trim_info['card_index'] = card_idx
         
         try:
+            if snapshot is None:
+                snapshot = self._card_snapshot(card)
+            
             # Generate unique ID for this card
-            card_id = self.get_card_unique_id_without_clicks(card)
+            card_id = self.get_card_unique_id_without_clicks(card, snapshot)
             trim_info['card_unique_id'] = card_id
             
             # 1. Extract CAR NAME from h3 tag
-            name_selectors = [
-                'h3.sc-gLaqbQ.eDBrkr.sc-eQwNpu.kogNIX.sc-Goufe.bwIAyQ',
-                'h3',
-                '.vehicle-name',
-                '.model-name',
-                '[class*="title"]',
-                '[class*="name"]'
-            ]
-            
-            car_name = ""
+            car_name = snapshot['name']
             model_name = ""
             trim_name = ""
             
-            for selector in name_selectors:
-                try:
-                    name_element = card.find_element(By.CSS_SELECTOR, selector)
-                    car_name = name_element.text.strip()
-                    if car_name:
-                        # Try to separate model and trim names
-                        # Pattern: "2024 Nissan Altima S"
-                        match = re.match(r'(\d{4})\s+(.+?)\s+(.+)', car_name)
-                        if match:
-                            trim_info['year'] = match.group(1)
-                            model_name = match.group(2)
-                            trim_name = match.group(3)
+            if car_name:
+                # Try to separate model and trim names
+                # Pattern: "2024 Nissan Altima S"
+                match = _NAME_RE.match(car_name)
+                if match:
+                    trim_info['year'] = match.group(1)
+                    model_name = match.group(2)
+                    trim_name = match.group(3)
+                else:
+                    # Try other patterns
+                    parts = car_name.split()
+                    if len(parts) >= 3:
+                        if parts[0].isdigit() and len(parts[0]) == 4:
+                            trim_info['year'] = parts[0]
+                            model_name = ' '.join(parts[1:-1])
+                            trim_name = parts[-1]
                         else:
-                            # Try other patterns
-                            parts = car_name.split()
-                            if len(parts) >= 3:
-                                if parts[0].isdigit() and len(parts[0]) == 4:
-                                    trim_info['year'] = parts[0]
-                                    model_name = ' '.join(parts[1:-1])
-                                    trim_name = parts[-1]
-                                else:
-                                    model_name = ' '.join(parts[:-1])
-                                    trim_name = parts[-1]
-                            elif len(parts) == 2:
-                                model_name = parts[0]
-                                trim_name = parts[1]
-                        
-                        break
-                except:
-                    continue
+                            model_name = ' '.join(parts[:-1])
+                            trim_name = parts[-1]
+                    elif len(parts) == 2:
+                        model_name = parts[0]
+                        trim_name = parts[1]
             
             if not car_name:
                 # Get any text from card
-                car_name = card.text.split('\n')[0] if card.text else f"Car_{card_idx}"
+                car_name = snapshot['text'].split('\n')[0] if snapshot['text'] else f"Car_{card_idx}"
             
             trim_info['car_name'] = car_name
             trim_info['model_name'] = model_name or base_car_info.get('name', '')
@@ -346,105 +1063,29 @@ class CarListProcessor:
             
             # Extract year from name if available
             if 'year' not in trim_info:
-                year_match = re.search(r'(20\d{2})', car_name)
+                year_match = _YEAR_RE.search(car_name)
                 if year_match:
                     trim_info['year'] = year_match.group(1)
             
             # 2. Extract PAGE LINK (NO CLICKING)
-            link_selectors = [
-                'a.sc-fhHczv.buKfDP.sc-kEjqvK.kDaJzo',
-                'a[class*="sc-fhHczv"]',
-                'a[href*="nissan"]',
-                'a[href]'
-            ]
-            
-            page_link = ""
-            for selector in link_selectors:
-                try:
-                    link_element = card.find_element(By.CSS_SELECTOR, selector)
-                    href = link_element.get_attribute('href')
-                    if href and ('nissan' in href or 'http' in href):
-                        page_link = href
-                        break
-                except:
-                    continue
-            
-            trim_info['page_link'] = page_link
+            trim_info['page_link'] = snapshot['page_link']
             
             # 3. Extract IMAGE URL (NO CLICKING)
-            try:
-                img_selectors = [
-                    'img.sc-cdmAjP',  # Your exact class
-                    'img',
-                    '[class*="image"] img',
-                    'picture img'
-                ]
-                
-                for selector in img_selectors:
-                    try:
-                        img_element = card.find_element(By.CSS_SELECTOR, selector)
-                        src = img_element.get_attribute('src')
-                        srcset = img_element.get_attribute('srcset')
-                        
-                        if src:
-                            trim_info['image_url'] = src
-                            break
-                        elif srcset:
-                            # Take first image from srcset
-                            first_img = srcset.split(',')[0].split(' ')[0]
-                            trim_info['image_url'] = first_img
-                            break
-                    except:
-                        continue
-                
-                if 'image_url' not in trim_info:
-                    trim_info['image_url'] = ""
-            except:
+            if snapshot['image_src']:
+                trim_info['image_url'] = snapshot['image_src']
+            elif snapshot['image_srcset']:
+                # Take first image from srcset
+                trim_info['image_url'] = snapshot['image_srcset'].split(',')[0].split(' ')[0]
+            else:
                 trim_info['image_url'] = ""
             
             # 4. Extract PRICE (NO CLICKING)
-            price_selectors = [
-                '.sc-clirCP.HQxrh',  # Your exact price class
-                '[class*="price"]',
-                '.price',
-                '.msrp',
-                '[data-testid*="price"]'
-            ]
-            
-            price_text = ""
-            for selector in price_selectors:
-                try:
-                    price_element = card.find_element(By.CSS_SELECTOR, selector)
-                    price_text = price_element.text.strip()
-                    if price_text:
-                        # Clean price text
-                        price_text = ' '.join(price_text.split())
-                        break
-                except:
-                    continue
-            
-            trim_info['price'] = price_text
+            # Clean price text
+            trim_info['price'] = ' '.join(snapshot['price'].split())
             
             # 5. Extract additional info if visible
-            try:
-                # Try to get drivetrain info if visible
-                drivetrain_selectors = [
-                    '[class*="drivetrain"]',
-                    '[class*="engine"]',
-                    '[class*="spec"]'
-                ]
-                
-                for selector in drivetrain_selectors:
-                    try:
-                        spec_element = card.find_element(By.CSS_SELECTOR, selector)
-                        spec_text = spec_element.text.strip()
-                        if spec_text and len(spec_text) < 50:
-                            trim_info['specs'] = spec_text
-                            break
-                    except:
-                        continue
-            except:
-                pass
+            if snapshot['specs']:
+                trim_info['specs'] = snapshot['specs']
             
             return trim_info
             
@@ -452,49 +1093,51 @@ class CarListProcessor:
             print(f"      ✗ Error extracting trim info: {str(e)[:50]}")
             return None
     
-    def get_card_unique_id_without_clicks(self, card):
+    def get_card_unique_id_without_clicks(self, card, snapshot=None):
         """Generate unique ID for card based on visible attributes (NO CLICKING)"""
         id_parts = []
         
         try:
+            if snapshot is None:
+                snapshot = self._card_snapshot(card)
+            
             # 1. Try data-testid
-            data_testid = card.get_attribute('data-testid')
+            data_testid = snapshot['data_testid']
             if data_testid:
                 id_parts.append(f"testid:{data_testid}")
             
             # 2. Try id attribute
-            elem_id = card.get_attribute('id')
+            elem_id = snapshot['id']
             if elem_id:
                 id_parts.append(f"id:{elem_id}")
             
             # 3. Try data-id
-            data_id = card.get_attribute('data-id')
+            data_id = snapshot['data_id']
             if data_id:
                 id_parts.append(f"data-id:{data_id}")
             
             # 4. Use visible text content (first 2 lines)
-            card_text = card.text.strip()
+            card_text = snapshot['text']
             lines = [line.strip() for line in card_text.split('\n') if line.strip()]
             if lines:
                 # Use first 2 meaningful lines, max 50 chars
                 text_id = '_'.join(lines[:2])[:50]
-                id_parts.append(f"text:{hash(text_id)}")
+                id_parts.append(f"text:{_stable_hash(text_id)}")
             
             # 5. Use classes
-            classes = card.get_attribute('class') or ''
+            classes = snapshot['classes']
             if classes:
                 # Filter out generic classes
                 specific_classes = [cls for cls in classes.split() 
                                   if len(cls) > 3]
                 if specific_classes:
-                    id_parts.append(f"class:{hash('_'.join(specific_classes[:2]))}")
+                    id_parts.append(f"class:{_stable_hash('_'.join(specific_classes[:2]))}")
             
             # 6. Use position (as fallback)
-            try:
-                location = card.location
-                id_parts.append(f"pos:{int(location['x'])}_{int(location['y'])}")
-            except:
-                pass
+            if snapshot.get('x') is not None:
+                id_parts.append(f"pos:{int(snapshot['x'])}_{int(snapshot['y'])}")
+            elif snapshot.get('path'):
+                id_parts.append(f"path:{_stable_hash(snapshot['path'])}")
             
             return '|'.join(id_parts) if id_parts else f"card_{time.time()}"
             
@@ -522,49 +1165,45 @@ class CarListProcessor:
             print(f"        ⚠ Car name too short: {car_name}")
             return False
         
+        # Optionally make sure the link actually resolves
+        if self.check_links and not self._head_ok(page_link):
+            print(f"        ⚠ Link not reachable: {page_link}")
+            return False
+        
         return True
     
+    def _head_ok(self, url):
+        """HEAD-check a URL over the shared session"""
+        try:
+            response = self._http.head(url, timeout=5, allow_redirects=True)
+            return response.status_code < 400
+        except requests.RequestException:
+            return False
+    
     def save_trim_data(self):
-        """Save all trim data to JSON file"""
-        if not self.all_trim_data:
+        """Build the detailed and simplified JSON files from the NDJSON stream"""
+        if not self.trim_count:
             print("No trim data to save!")
             return
         
-        # Save detailed data
-        self.scraper.save_to_json(self.all_trim_data, "nissan_trims_detailed.json")
-        
-        # Save simplified version with validation
-        simplified_data = []
-        
-        for trim in self.all_trim_data:
-            # Only include validated data
-            if self.validate_trim_data(trim):
-                simple_trim = {
-                    'id': trim.get('id'),
-                    'car_name': trim.get('car_name', ''),
-                    'model_name': trim.get('model_name', ''),
-                    'trim_name': trim.get('trim_name', ''),
-                    'year': trim.get('year', ''),
-                    'price': trim.get('price', ''),
-                    'page_link': trim.get('page_link', ''),
-                    'image_url': trim.get('image_url', ''),
-                    'specs': trim.get('specs', ''),
-                    'card_unique_id': trim.get('card_unique_id', '')
-                }
-                
-                # Validate each field is not empty where required
-                if simple_trim['car_name'] and simple_trim['page_link']:
-                    simplified_data.append(simple_trim)
+        # No more link checks after this point
+        if self._owns_http:
+            self._http.close()
+        
+        # Save detailed data (streamed straight from the NDJSON file)
+        self.scraper.save_to_json(self.iter_spilled_trims(), "nissan_trims_detailed.json")
         
-        self.scraper.save_to_json(simplified_data, "nissan_trims_simple.json")
+        # The simplified trims were appended as they were found
+        self.write_simple_json()
         
         print(f"\n{'='*60}")
         print("TRIM PROCESSING COMPLETE (NO CLICK MODE)")
         print(f"{'='*60}")
-        print(f"✓ Total cards processed: {len(self.all_trim_data)}")
-        print(f"✓ Validated trims saved: {len(simplified_data)}")
+        print(f"✓ Total cards processed: {self.trim_count}")
+        print(f"✓ Validated trims saved: {self.simple_count}")
         print(f"✓ Detailed data saved to: nissan_trims_detailed.json")
-        print(f"✓ Simplified data saved to: nissan_trims_simple.json")
+        print(f"✓ Simplified data saved to: {TRIM_SIMPLE_STREAM_FILE} (and {TRIM_SIMPLE_FILE})")
+        print(f"✓ Raw trim stream kept in: {TRIM_SPILL_FILE}")
         print(f"✓ No links were clicked during processing")
         print(f"{'='*60}")
         
@@ -574,16 +1213,24 @@ class CarListProcessor:
         # Open build instructions file
         self.show_build_instructions()
     
+    def write_simple_json(self):
+        """Materialize the legacy simplified JSON array from the JSON-Lines file"""
+        self.scraper.save_to_json(self.iter_spilled_trims(TRIM_SIMPLE_STREAM_FILE), TRIM_SIMPLE_FILE)
+    
     def print_validation_summary(self):
         """Print validation summary"""
         print("\n📊 VALIDATION SUMMARY:")
         print("-" * 40)
         
-        total = len(self.all_trim_data)
-        with_name = sum(1 for t in self.all_trim_data if t.get('car_name'))
-        with_link = sum(1 for t in self.all_trim_data if t.get('page_link'))
-        with_image = sum(1 for t in self.all_trim_data if t.get('image_url'))
-        with_price = sum(1 for t in self.all_trim_data if t.get('price'))
+        # One pass over the stream instead of one per field
+        total = with_name = with_link = with_image = with_price = 0
+        for t in self.iter_spilled_trims():
+            get = t.get
+            total += 1
+            with_name += bool(get('car_name'))
+            with_link += bool(get('page_link'))
+            with_image += bool(get('image_url'))
+            with_price += bool(get('price'))
         
         print(f"Total trims found: {total}")
         print(f"With valid name: {with_name} ({with_name/total*100:.1f}%)")
@@ -598,7 +1245,7 @@ class CarListProcessor:
         print("="*60)
         print("1. Open 'build_configurator.py' to continue with build process")
         print("2. The script will:")
-        print("   - Load trim data from 'nissan_trims_simple.json'")
+        print(f"   - Load trim data from '{TRIM_SIMPLE_STREAM_FILE}'")
         print("   - Process each build configuration")
         print("   - Extract detailed options and packages")
         print("3. Run: python build_configurator.py")
@@ -0,0 +1,44 @@
+"""
+HTTP Client - headers and HTTP client factories for plain (no-browser) fetches
+Shared by the list scraper, the trim processor and the workflow context
+"""
+
+import importlib.util
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+except ImportError:  # without it every car page goes through the browser
+    httpx = None
+
+
+STATIC_HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                   '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'),
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+
+def make_http_session(pool_size=16):
+    """Pooled requests session (keep-alive, small retry budget) for plain HTTP calls"""
+    session = requests.Session()
+    session.headers.update(STATIC_HEADERS)
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=pool_size, max_retries=Retry(total=2))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def make_static_client(max_connections=20):
+    """Async HTTP client for concurrent page fetches (None if httpx is missing)"""
+    if httpx is None:
+        return None
+    return httpx.AsyncClient(
+        http2=importlib.util.find_spec('h2') is not None,
+        limits=httpx.Limits(max_connections=max_connections),
+        headers=STATIC_HEADERS,
+        follow_redirects=True,
+        timeout=15
+    )
@@ -2,19 +2,55 @@
 Build Workflow Manager - Complete build configuration workflow
 """
 
-import time
+import os
 import sys
-from build_configurator import BuildConfigurator
+import argparse
+from build_configurator import (
+    NissanBuildPageScraper, load_trim_links, TRIM_STREAM_FILE, TRIM_JSON_FILE
+)
+from run_full_process import positive_int
 
 
-def run_build_workflow():
-    """Run complete build configuration workflow"""
+# Menu numbers of the interactive prompt -> --mode values
+MENU_MODES = {'1': 'all', '2': 'count', '3': 'test'}
+
+
+def prompt_for_mode():
+    """Interactive fallback: ask for the mode (and count) on the terminal"""
+    print("\n⚙️  Configuration Options:")
+    print("1. Process all trims")
+    print("2. Process specific number of trims")
+    print("3. Test mode (process first trim only)")
+    
+    choice = input("\nSelect option (1-3): ").strip()
+    mode = MENU_MODES.get(choice)
+    if mode is None:
+        print("Invalid choice. Processing all trims.")
+        return 'all', None
+    
+    count = None
+    if mode == 'count':
+        try:
+            count = positive_int(input("How many trims to process? "))
+        except argparse.ArgumentTypeError:
+            print("Invalid number. Processing all trims.")
+            return 'all', None
+    
+    return mode, count
+
+
+def run_build_workflow(mode=None, count=None, headless=True):
+    """Run complete build configuration workflow
+    
+    mode is 'all', 'count' (first `count` trims) or 'test' (first trim);
+    None asks interactively.
+    """
     print("="*70)
     print("NISSAN BUILD CONFIGURATION WORKFLOW")
     print("="*70)
     
     print("\n📋 This workflow will:")
-    print("1. Load trim data from nissan_trims_simple.json")
+    print(f"1. Load trim data from {TRIM_STREAM_FILE} (or {TRIM_JSON_FILE})")
     print("2. Process each build configuration")
     print("3. Handle multiple drivetrain options")
     print("4. Track button clicks and changes")
@@ -22,68 +58,51 @@ def run_build_workflow():
     print("="*70)
     
     # Check if trim data exists
-    import os
-    if not os.path.exists("nissan_trims_simple.json"):
-        print("\n❌ Error: nissan_trims_simple.json not found!")
+    if not os.path.exists(TRIM_STREAM_FILE) and not os.path.exists(TRIM_JSON_FILE):
+        print(f"\n❌ Error: neither {TRIM_STREAM_FILE} nor {TRIM_JSON_FILE} found!")
         print("\nPlease run car_list_processor.py first to generate trim data.")
         print("Or run run_full_process.py for complete workflow.")
         return
     
-    # Configuration options
-    print("\n⚙️  Configuration Options:")
-    print("1. Process all trims")
-    print("2. Process specific number of trims")
-    print("3. Test mode (process first trim only)")
-    
     try:
-        choice = input("\nSelect option (1-3): ").strip()
+        if mode is None:
+            mode, count = prompt_for_mode()
         
-        configurator = BuildConfigurator(headless=False)
+        if mode == 'count' and count is None:
+            print("No trim count given. Processing all trims.")
+            mode = 'all'
         
-        if choice == "1":
-            print("\nProcessing ALL trims...")
-            configurator.process_build_configurations()
+        build_links = load_trim_links()
+        if not build_links:
+            print("No trim data available.")
+            return
+        
+        # One browser for the whole session; closed on exit from the block
+        with NissanBuildPageScraper(headless=headless) as configurator:
+            if mode == 'all':
+                print(f"\nProcessing ALL {len(build_links)} trims...")
+                configurator.scrape_build_stream(build_links)
             
-        elif choice == "2":
-            try:
-                count = int(input("How many trims to process? "))
+            elif mode == 'count':
                 print(f"\nProcessing first {count} trims...")
-                # We'll modify the configurator to process limited trims
-                configurator.process_limited_configurations(count)
-            except ValueError:
-                print("Invalid number. Processing all trims.")
-                configurator.process_build_configurations()
-                
-        elif choice == "3":
-            print("\nRunning in TEST mode (first trim only)...")
-            # Test with first trim only
-            import json
-            with open("nissan_trims_simple.json", 'r') as f:
-                trim_data = json.load(f)
+                configurator.scrape_build_stream(build_links[:count])
             
-            if trim_data:
-                test_trim = trim_data[0]
-                print(f"Testing with: {test_trim.get('full_name', 'Unknown')}")
+            elif mode == 'test':
+                print("\nRunning in TEST mode (first trim only)...")
+                print(f"Testing with: {build_links[0]}")
                 
-                # Process single trim
-                config_data = configurator.scrape_build_page_with_drivetrains(
-                    test_trim.get('build_link', ''),
-                    test_trim
-                )
-                
-                if config_data:
-                    configurator.configurations = [config_data]
-                    configurator.save_configurations()
+                if configurator.scrape_single_build(build_links[0]):
                     print("\n✅ Test completed successfully!")
                 else:
                     print("\n❌ Test failed!")
-            else:
-                print("No trim data available for testing.")
-        
-        else:
-            print("Invalid choice. Processing all trims.")
-            configurator.process_build_configurations()
-            
+                
+                # Go on to the full run without paying for a second browser start
+                if sys.stdin.isatty() and len(build_links) > 1:
+                    answer = input("\nContinue with full run? [y/N]: ").strip().lower()
+                    if answer in ['yes', 'y']:
+                        print(f"\nProcessing the remaining {len(build_links) - 1} trims...")
+                        configurator.scrape_build_stream(build_links[1:])
+    
     except KeyboardInterrupt:
         print("\n\n⚠ Workflow interrupted by user")
     except Exception as e:
@@ -91,19 +110,34 @@ def run_build_workflow():
         import traceback
         traceback.print_exc()
     finally:
-        if 'configurator' in locals():
-            configurator.close()
-        
         print("\n" + "="*70)
         print("WORKFLOW COMPLETED")
         print("="*70)
         print("\nGenerated files:")
-        print("• nissan_build_configurations_detailed.json")
-        print("• nissan_build_configurations_simple.json")
-        print("• build_configuration_detailed_report.txt")
-        print("\nYou can view the detailed report for button click statistics.")
+        print("• nissan_build_data_<timestamp>.json (one per build page)")
+        print("• nissan_all_builds_<timestamp>.json (all pages of a batch)")
         print("="*70)
 
 
+def main():
+    """Parse command line flags; with none on a terminal, fall back to the prompt"""
+    parser = argparse.ArgumentParser(description="Nissan build configuration workflow")
+    parser.add_argument('--mode', choices=['all', 'count', 'test'],
+                        help="all trims, the first --count trims, or the first trim only")
+    parser.add_argument('--count', type=positive_int, help="number of trims for --mode count")
+    parser.add_argument('--gui', action='store_true',
+                        help="show the Chrome window (runs headless otherwise)")
+    args = parser.parse_args()
+    
+    mode = args.mode
+    if mode is None and args.count is not None:
+        mode = 'count'
+    elif mode is None and not sys.stdin.isatty():
+        # Unattended run (cron, CI, pipes): nobody to answer the prompt
+        mode = 'all'
+    
+    run_build_workflow(mode, args.count, headless=not args.gui)
+
+
 if __name__ == "__main__":
-    run_build_workflow()
\ No newline at end of file
+    main()
\ No newline at end of file
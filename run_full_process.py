@@ -2,90 +2,354 @@
 Complete Workflow Runner - Runs the entire scraping process
 """
 
-import time
-from car_list import NissanCarListScraper
-from car_list_processor import CarListProcessor
+import sys
+import logging
+import argparse
+import asyncio
+import multiprocessing
 
+try:
+    import diskcache
+except ImportError:  # no cache: every run fetches every car page again
+    diskcache = None
 
-def run_full_process():
-    """Run the complete scraping process"""
-    print("="*60)
-    print("NISSAN USA COMPLETE SCRAPING WORKFLOW")
-    print("="*60)
+
+logger = logging.getLogger('workflow')
+
+RULE = "=" * 60
+
+# Browsers in the workflow's pool: one loads the list page, then all of
+# them take car pages that need a browser
+TRIM_WORKERS = 4
+
+# Car pages handled at once; most only need an HTTP fetch, not a browser
+TRIM_CONSUMERS = 16
+
+# Extra Chrome switches/prefs for the workflow's browsers: nothing here ever
+# looks at pixels, so skip image decoding, extensions and background traffic
+FAST_CHROME_ARGS = [
+    '--blink-settings=imagesEnabled=false',
+    '--disable-extensions',
+    '--disable-background-networking',
+]
+FAST_CHROME_PREFS = {
+    "profile.default_content_setting_values.notifications": 2,
+}
+
+# JS-built car pages rendered at once by Playwright (--playwright)
+PLAYWRIGHT_PAGES = 8
+
+# Static car pages and their parsed trims, revalidated with ETags on rerun
+TRIM_CACHE_DIR = '.cache/trims'
+
+DEFAULT_BUILD_LINK = "https://www.nissanusa.com/vehicles/build-price.html"
+
+# Trims on disk before the build configurator (--auto-build) is started
+BUILD_START_AFTER_TRIMS = 10
+
+
+def start_build_configurator(done_event, headless=True, grid_url=None):
+    """Step 3 in its own process, following the trim stream while step 2 runs"""
+    # Only pulled in when it is actually going to run
+    from build_configurator import run_streaming
+    
+    process = multiprocessing.get_context('spawn').Process(
+        target=run_streaming,
+        kwargs={'done_event': done_event, 'headless': headless, 'grid_url': grid_url}
+    )
+    process.start()
+    logger.info(f"\n🚀 Build configurator started (pid {process.pid})")
+    return process
+
+
+def make_browser_pool(workers=TRIM_WORKERS, headless=True, grid_url=None, ctx=None):
+    """Warm browsers shared by every step of the workflow (start in the background)
     
-    print("\n📋 WORKFLOW STEPS:")
-    print("1. Get car list from build link")
-    print("2. Save car list to JSON")
-    print("3. Process each car for trim details")
-    print("4. Process build configurations")
-    print("="*60)
+    With grid_url they are Selenium Grid sessions, so workers can go well
+    past what one machine could run.
+    """
+    from browser_pool import BrowserPool
+    from car_list import NissanCarListScraper
     
-    # Get build link from user
-    print("\nEnter Nissan build link (or press Enter for default):")
-    build_link = input("Link: ").strip()
+    return BrowserPool(
+        lambda: NissanCarListScraper(
+            headless=headless, chrome_args=FAST_CHROME_ARGS, chrome_prefs=FAST_CHROME_PREFS,
+            grid_url=grid_url, ctx=ctx, lazy_driver=False
+        ),
+        size=workers
+    )
+
+
+async def scrape_pipeline(build_link, pool, ctx, consumers=TRIM_CONSUMERS,
+                          auto_build=False, headless=True, prefetched=None, playwright=False,
+                          grid_url=None, resume=False, check_links=False):
+    """Steps 1+2 overlapped: each car found by the list scraper is queued
+    straight away and picked up by trim workers, which fetch it over plain
+    HTTP when possible and fall back to browsers from the pool otherwise.
+    With playwright, JS-built pages are tried in one async Chromium before
+    the pool. With auto_build, step 3 joins in once the first trims are on disk.
+    All plain HTTP goes through ctx, the run's WorkflowContext. With resume,
+    cars finished by an earlier run are skipped and their trims kept; with
+    check_links, trims whose link does not answer a HEAD request are dropped."""
+    from car_list_processor import CarListProcessor, make_page_renderer
     
-    if not build_link:
-        build_link = "https://www.nissanusa.com/vehicles/build-price.html"
-        print(f"Using default: {build_link}")
+    loop = asyncio.get_running_loop()
+    cars = asyncio.Queue()
     
-    # STEP 1: Get car list
-    print(f"\n{'='*60}")
-    print("STEP 1: GETTING CAR LIST")
-    print(f"{'='*60}")
+    # The list page borrows the first browser to come up; the rest are
+    # still starting while it loads
+    scraper = await asyncio.to_thread(pool.acquire)
+    trim_cache = diskcache.Cache(TRIM_CACHE_DIR) if diskcache is not None else None
+    processor = CarListProcessor(
+        scraper, resume=resume, check_links=check_links, cache=trim_cache, ctx=ctx
+    )
+    build = None
+    build_done = multiprocessing.get_context('spawn').Event() if auto_build else None
     
-    scraper = NissanCarListScraper(headless=False)
+    async def produce():
+        try:
+            await asyncio.to_thread(
+                scraper.scrape_car_list_from_link,
+                build_link,
+                on_car=lambda car: loop.call_soon_threadsafe(cars.put_nowait, car),
+                prefetched=prefetched
+            )
+        finally:
+            # Its browser joins the trim workers
+            pool.release(scraper)
+            # One stop marker per consumer, queued behind every real car
+            for _ in range(consumers):
+                loop.call_soon_threadsafe(cars.put_nowait, None)
     
+    async def consume(client):
+        nonlocal build
+        while True:
+            car = await cars.get()
+            if car is None:
+                return
+            try:
+                await processor.process_single_link_async(car, client, pool, renderer)
+            except Exception as e:
+                # One bad car must not take the other consumers down with it
+                logger.error(f"✗ Error processing {car.get('page_link')}: {str(e)[:100]}")
+                continue
+            if auto_build and build is None and processor.simple_count >= BUILD_START_AFTER_TRIMS:
+                build = start_build_configurator(build_done, headless, grid_url)
+    
+    client = ctx.open_async_http()
+    renderer = make_page_renderer(PLAYWRIGHT_PAGES, headless) if playwright else None
+    if playwright and renderer is None:
+        logger.warning("⚠ playwright (or lxml) is not installed, using the Selenium pool only")
     try:
-        scraper.scrape_car_list_from_link(build_link)
-    except Exception as e:
-        print(f"Error in step 1: {e}")
-        scraper.close()
+        if renderer is not None:
+            try:
+                await renderer.start()
+            except Exception as e:
+                logger.warning(f"⚠ Could not start Playwright ({str(e)[:80]}), using the Selenium pool only")
+                renderer = None
+        
+        with processor.streaming_output():
+            await asyncio.gather(produce(), *(consume(client) for _ in range(consumers)))
+        
+        # Fewer trims than the threshold: start it now on what there is
+        if auto_build and build is None and processor.simple_count:
+            build = start_build_configurator(build_done, headless, grid_url)
+    finally:
+        if build_done is not None:
+            build_done.set()  # the stream is closed; let the configurator drain it
+        await ctx.close_async_http()
+        if renderer is not None:
+            await renderer.close()
+        if trim_cache is not None:
+            trim_cache.close()
+    
+    if processor.trim_count:
+        processor.save_trim_data()
+    else:
+        logger.warning("\n⚠ No trim data found")
+    
+    if build is not None:
+        logger.info("\nWaiting for the build configurator to finish...")
+        await asyncio.to_thread(build.join)
+    
+    return build is not None
+
+
+def process_saved_car_list(pool, ctx, resume=False, check_links=False, tabs=0):
+    """Step 2 on its own: the car list saved by an earlier run, one car per
+    pool browser at a time (no list page, so nothing to overlap with).
+    With tabs, a single browser loads that many cars side by side in tabs."""
+    from car_list_processor import CarListProcessor
+    
+    if tabs:
+        with pool.borrow() as scraper:
+            processor = CarListProcessor(scraper, resume=resume, check_links=check_links, ctx=ctx)
+            processor.process_car_links_in_tabs(tabs)
         return
     
-    # Wait a bit before next step
-    time.sleep(2)
+    # The processor's own scraper only saves files; every browser, this
+    # one included, goes back to the pool for the cars
+    scraper = pool.acquire()
+    pool.release(scraper)
+    processor = CarListProcessor(scraper, resume=resume, check_links=check_links, ctx=ctx)
+    processor.process_car_links_parallel(pool)
+
+
+def run_full_process(build_link=DEFAULT_BUILD_LINK, workers=TRIM_WORKERS, headless=True,
+                     run_config=False, auto_build=False, playwright=False, grid_url=None,
+                     resume=False, check_links=False, from_car_list=False, tabs=0):
+    """Run the complete scraping process"""
+    logger.info("\n".join([
+        RULE,
+        "NISSAN USA COMPLETE SCRAPING WORKFLOW",
+        RULE,
+        "",
+        "📋 WORKFLOW STEPS:",
+        "1. Get car list from build link",
+        "2. Save car list to JSON",
+        "3. Process each car for trim details (starts while step 1 runs)",
+        "4. Process build configurations",
+        RULE,
+        "",
+        f"Build link: {build_link}",
+    ]))
     
-    # STEP 2: Process car list for trims
-    print(f"\n{'='*60}")
-    print("STEP 2: PROCESSING TRIM DETAILS")
-    print(f"{'='*60}")
+    if from_car_list:
+        logger.info(f"\n{RULE}\nSTEP 2: PROCESSING TRIM DETAILS FROM nissan_car_list.json\n{RULE}")
+    else:
+        # STEPS 1+2: Get car list and process trims as a pipeline
+        logger.info(f"\n{RULE}\nSTEPS 1+2: GETTING CAR LIST AND PROCESSING TRIM DETAILS\n{RULE}")
     
-    processor = CarListProcessor(scraper)
-    processor.process_car_links()
+    # Selenium and friends are only imported once there is work to do,
+    # so --help and bad arguments return straight away
+    from car_list import prefetch_build_page
+    from workflow_context import WorkflowContext
     
-    # Close scraper
-    scraper.close()
+    # One HTTP stack and one set of browsers for steps 1-2, closed before step 3
+    ctx = WorkflowContext()
     
-    # STEP 3: Instructions for build configurator
-    print(f"\n{'='*60}")
-    print("NEXT STEP INSTRUCTIONS")
-    print(f"{'='*60}")
-    print("\nTo process build configurations:")
-    print("1. Open a new terminal/command prompt")
-    print("2. Run: python build_configurator.py")
-    print("\nThe build configurator will:")
-    print("• Load trim data from nissan_trims_simple.json")
-    print("• Process each build link")
-    print("• Extract detailed configuration options")
-    print("• Generate summary report")
-    print(f"{'='*60}")
-    
-    # Optional: Ask if user wants to run build configurator now
-    print("\nDo you want to run the build configurator now?")
-    run_now = input("Run build configurator? (yes/no): ").strip().lower()
-    
-    if run_now in ['yes', 'y']:
-        print("\nStarting build configurator...")
-        print("="*60)
+    # The build page downloads while the browsers start up
+    prefetched = None if from_car_list else prefetch_build_page(build_link, ctx.http)
+    
+    pool = None
+    try:
+        # Tabs share one browser, so there is no point starting more
+        pool = make_browser_pool(1 if tabs else workers, headless, grid_url, ctx)
+        
+        if from_car_list:
+            process_saved_car_list(
+                pool, ctx, resume=resume, check_links=check_links, tabs=tabs
+            )
+            build_ran = False
+        else:
+            build_ran = asyncio.run(scrape_pipeline(
+                build_link, pool, ctx, auto_build=auto_build, headless=headless,
+                prefetched=prefetched, playwright=playwright, grid_url=grid_url,
+                resume=resume, check_links=check_links
+            ))
+    except Exception as e:
+        logger.error(f"Error in steps 1-2: {e}")
+        return
+    finally:
+        # Done with the pool's browsers before step 3 starts its own
+        if pool is not None:
+            pool.close_all()
+        ctx.close()
+    
+    if build_ran:
+        return
+    
+    if run_config:
+        logger.info(f"\n{RULE}\nSTEP 3: PROCESSING BUILD CONFIGURATIONS\n{RULE}")
         
-        # Import and run build configurator
-        from build_configurator import NissanBuildScraper, main as run_build_config
+        from build_configurator import run_streaming
         
-        run_build_config()
-    else:
-        print("\nYou can run the build configurator later with:")
-        print("> python build_configurator.py")
+        # Its own browser: the pool's ones block stylesheets, fonts and
+        # images, and the configurator clicks through a styled page
+        run_streaming(headless=headless, grid_url=grid_url)
+        return
+    
+    # STEP 3: Instructions for build configurator
+    logger.info("\n".join([
+        "",
+        RULE,
+        "NEXT STEP INSTRUCTIONS",
+        RULE,
+        "",
+        "To process build configurations:",
+        "1. Open a new terminal/command prompt",
+        "2. Run: python build_configurator.py",
+        "",
+        "The build configurator will:",
+        "• Load trim data from nissan_trims_simple.jsonl",
+        "• Process each build link",
+        "• Extract detailed configuration options",
+        "• Generate summary report",
+        "",
+        "Or rerun with --run-config (after step 2) or --auto-build (alongside it)",
+        RULE,
+    ]))
+
+
+def positive_int(value):
+    """argparse type for counts that must be at least 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value!r} is not a whole number")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def main():
+    """Parse command line flags and run the workflow"""
+    parser = argparse.ArgumentParser(description="Run the complete Nissan scraping workflow")
+    parser.add_argument('--build-link', default=DEFAULT_BUILD_LINK,
+                        help="Nissan build & price page listing the cars")
+    parser.add_argument('--workers', type=positive_int, default=TRIM_WORKERS,
+                        help="browsers for car pages that need one")
+    parser.add_argument('--headless', action=argparse.BooleanOptionalAction, default=True,
+                        help="run Chrome without a window (--no-headless to watch it)")
+    parser.add_argument('--run-config', action=argparse.BooleanOptionalAction, default=False,
+                        help="run the build configurator once the trims are saved")
+    parser.add_argument('--auto-build', action='store_true',
+                        help="start the build configurator as soon as trims are found")
+    parser.add_argument('--playwright', action='store_true',
+                        help="render JS-built car pages with Playwright before using the browser pool")
+    parser.add_argument('--grid-url',
+                        help="Selenium Grid hub (e.g. http://hub:4444) to run the browsers on")
+    parser.add_argument('--resume', action='store_true',
+                        help="skip cars listed in processed_links.txt and append to the trim files")
+    parser.add_argument('--check-links', action='store_true',
+                        help="HEAD-check each trim's link and drop the ones that do not resolve")
+    parser.add_argument('--from-car-list', action='store_true',
+                        help="skip the list page and process the saved nissan_car_list.json")
+    parser.add_argument('--tabs', type=positive_int, default=0,
+                        help="with --from-car-list: use one browser loading this many cars in tabs")
+    args = parser.parse_args()
+    if args.tabs and not args.from_car_list:
+        parser.error("--tabs needs --from-car-list")
+    if args.from_car_list and (args.auto_build or args.playwright):
+        parser.error("--auto-build and --playwright only apply to the list+trims pipeline")
+    
+    # Plain messages on stdout, interleaving with the scrapers' own output
+    logging.basicConfig(format='%(message)s', level=logging.INFO, stream=sys.stdout)
+    
+    run_full_process(
+        build_link=args.build_link,
+        workers=args.workers,
+        headless=args.headless,
+        run_config=args.run_config,
+        auto_build=args.auto_build,
+        playwright=args.playwright,
+        grid_url=args.grid_url,
+        resume=args.resume,
+        check_links=args.check_links,
+        from_car_list=args.from_car_list,
+        tabs=args.tabs,
+    )
 
 
 if __name__ == "__main__":
-    run_full_process()
\ No newline at end of file
+    main()
\ No newline at end of file
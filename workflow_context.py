@@ -0,0 +1,43 @@
+"""
+Workflow Context - HTTP clients shared by every step of one workflow run
+"""
+
+from http_client import make_http_session, make_static_client
+
+
+# Connections kept per host by the shared clients
+HTTP_MAX_CONNECTIONS = 50
+
+
+class WorkflowContext:
+    """One HTTP stack for the list scraper, the trim processor and the pipeline
+    
+    http is a pooled requests.Session for plain fetches from any thread
+    (build page, link checks). async_http is the httpx client (HTTP/2 when
+    h2 is installed) for the pipeline's concurrent car page fetches; it is
+    bound to an event loop, so it is opened and closed from inside one.
+    """
+    
+    def __init__(self, max_connections=HTTP_MAX_CONNECTIONS):
+        self.max_connections = max_connections
+        self.http = make_http_session(max_connections)
+        self.async_http = None
+    
+    def open_async_http(self):
+        """Create async_http (None without httpx); call it from the loop that uses it"""
+        self.async_http = make_static_client(self.max_connections)
+        return self.async_http
+    
+    async def close_async_http(self):
+        if self.async_http is not None:
+            await self.async_http.aclose()
+            self.async_http = None
+    
+    def close(self):
+        self.http.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()